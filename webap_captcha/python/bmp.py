@@ -0,0 +1,56 @@
+"""
+不經過 PIL，直接把 WebAP 回傳的未壓縮 BMP 解成 NumPy view（不複製像素）。
+
+只支援 24/32 位元、BI_RGB（無壓縮）的 BMP，也就是 validateCode.jsp 回傳的格式。
+"""
+
+from __future__ import annotations
+import struct
+
+import numpy as np
+
+_FILE_HEADER = struct.Struct("<2sIHHI")  # magic, file size, reserved, reserved, pixel offset
+_INFO_HEADER = struct.Struct("<IiiHHI")  # header size, width, height, planes, bpp, compression
+
+_BI_RGB = 0
+
+
+def decode(data: bytes | bytearray | memoryview) -> np.ndarray:
+    """
+    Decode an uncompressed 24/32-bit BMP into an (H, W, 3) RGB uint8 array.
+
+    The result is a strided view over `data`: bottom-up rows are read with a
+    negative row stride, row padding is skipped, and BGR(A) is reversed to
+    RGB with a negative channel stride. It is read-only when `data` is bytes;
+    use `np.array(image)` for a contiguous, writable copy.
+    """
+    if len(data) < _FILE_HEADER.size + _INFO_HEADER.size:
+        raise ValueError(f"BMP data too short ({len(data)} bytes)")
+
+    magic, _, _, _, offset = _FILE_HEADER.unpack_from(data, 0)
+    if magic != b"BM":
+        raise ValueError("Not a BMP image")
+
+    header_size, width, height, planes, bpp, compression = _INFO_HEADER.unpack_from(
+        data, _FILE_HEADER.size
+    )
+    if header_size < _INFO_HEADER.size or planes != 1:
+        raise ValueError(f"Unsupported BMP header (size {header_size}, planes {planes})")
+    if bpp not in (24, 32) or compression != _BI_RGB:
+        raise ValueError(f"Unsupported BMP format ({bpp} bpp, compression {compression})")
+    if width <= 0 or height == 0:
+        raise ValueError(f"Invalid BMP size {width}x{height}")
+
+    # 每一列補齊到 4 bytes
+    channels = bpp // 8
+    stride = (width * channels + 3) // 4 * 4
+    rows = abs(height)
+    if offset + rows * stride > len(data):
+        raise ValueError("Truncated BMP pixel data")
+
+    pixels = np.frombuffer(data, dtype=np.uint8, count=rows * stride, offset=offset)
+    pixels = pixels.reshape(rows, stride)
+    if height > 0:
+        # 正的高度代表由下而上儲存
+        pixels = pixels[::-1]
+    return pixels[:, : width * channels].reshape(rows, width, channels)[:, :, 2::-1]
@@ -9,6 +9,7 @@ import os
 
 from uuid import uuid4
 import segment
+import template_bank
 import utils
 
 for path in glob("test/tflite/success/*.bmp") + glob("test/eucdist/success/*.bmp"):
@@ -16,7 +17,7 @@ for path in glob("test/tflite/success/*.bmp") + glob("test/eucdist/success/*.bmp
     image = Image.open(path)
     img = np.array(image)
 
-    img_bin = utils.binarize_image(img, 138)
+    img_bin = utils.binarize_image(img, utils.THRESHOLD)
 
     labels_im, num_labels = segment.label(img_bin, background=255)
 
@@ -55,3 +56,6 @@ for char in os.listdir("assets"):
         Image.fromarray(avg.astype(np.uint8)).save(f"assets/{char}.bmp")
     else:
         print(f"Warning: No images found for character '{char}'. Skipping.")
+
+# 重新編譯比對用的模板檔
+template_bank.build()
@@ -1,13 +1,25 @@
+from functools import cache
+
 import numpy as np
-from PIL import Image
 
-key = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-table = [np.array(Image.open(f"assets/{k}.bmp")) for k in key]
+import template_bank
+from matcher import TemplateMatcher, to_canvas
+
+key = template_bank.KEY
+
+
+@cache
+def get_templates() -> TemplateMatcher:
+    """Templates are loaded from the compiled bank on first use."""
+    bank = template_bank.load()
+    return TemplateMatcher(bank.key, bank.wide)
+
 
 def cossim(image1: np.ndarray, image2: np.ndarray) -> float:
     """Compute the Cosine similarity between two images."""
     if image1.shape != image2.shape:
         raise ValueError(f"Images must have the same shape. Got {image1.shape} and {image2.shape}")
+    image1, image2 = image1.astype(np.int64), image2.astype(np.int64)
     dot_product = np.sum(image1 * image2)
     norm1 = np.sqrt(np.sum(image1 ** 2))
     norm2 = np.sqrt(np.sum(image2 ** 2))
@@ -16,14 +28,26 @@ def cossim(image1: np.ndarray, image2: np.ndarray) -> float:
     return np.abs(dot_product / (norm1 * norm2))
 
 
+def get_similarities(images: list[np.ndarray] | np.ndarray) -> np.ndarray:
+    """Similarities of every character image to every template, shape (..., 35)."""
+    return get_templates().similarities(images)
+
+
+def get_top_k(images: list[np.ndarray] | np.ndarray, k: int = 3) -> list[list[tuple[str, float]]]:
+    """The k most similar characters (with similarities) of each character image."""
+    indices, similarities = get_templates().top_k(get_similarities(images), k, largest=True)
+    return [
+        [(key[i], float(s)) for i, s in zip(row_i, row_s)]
+        for row_i, row_s in zip(indices.reshape(-1, k), similarities.reshape(-1, k))
+    ]
+
+
+def get_characters(images: list[np.ndarray] | np.ndarray) -> str:
+    """Get the characters represented by all images in one batch."""
+    return get_templates().decode(np.argmax(get_similarities(images), axis=-1))
+
+
 def get_character(image: np.ndarray) -> str:
     """Get the character represented by the image."""
-    # Resize the image to 22x22 and place it in the middle of a 22x22 canvas
-    canva = np.zeros((22, 22), dtype=np.uint8)
-    h, w = image.shape
-    canva[(22 - h) // 2:(22 - h) // 2 + h, (22 - w) // 2:(22 - w) // 2 + w] = image
-    # Compute the distances to all character templates
-    distances = [cossim(canva, template) for template in table]
-    # Find the index of the minimum distance
-    min_index = np.argmin(distances)
-    return key[min_index]
\ No newline at end of file
+    # Place the image in the middle of a 22x22 canvas and compare with all templates
+    return get_characters(to_canvas([image]))
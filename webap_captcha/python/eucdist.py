@@ -1,24 +1,65 @@
+from functools import cache
+
 import numpy as np
-from PIL import Image
 
-key = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-table = [np.array(Image.open(f"assets/{k}.bmp")) for k in key]
+import template_bank
+from matcher import TemplateMatcher, to_canvas
+
+key = template_bank.KEY
+
+
+@cache
+def get_templates() -> TemplateMatcher:
+    """Templates are loaded from the compiled bank on first use."""
+    bank = template_bank.load()
+    return TemplateMatcher(bank.key, bank.wide)
+
 
 def eucdist(image1: np.ndarray, image2: np.ndarray) -> float:
     """Compute the Euclidean distance between two images."""
     if image1.shape != image2.shape:
         raise ValueError(f"Images must have the same shape. Got {image1.shape} and {image2.shape}")
-    return np.sqrt(np.sum((image1 - image2) ** 2))
+    diff = image1.astype(np.int64) - image2.astype(np.int64)
+    return np.sqrt(np.sum(diff ** 2))
+
+
+def get_distances(images: list[np.ndarray] | np.ndarray) -> np.ndarray:
+    """Distances of every character image to every template, shape (..., 35)."""
+    return get_templates().distances(images)
+
+
+def get_shifted_distances(
+    images: list[np.ndarray] | np.ndarray, max_shift: int = 1
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Distances minimized over ±max_shift pixel translations, shape (..., 35),
+    and the (dy, dx) offset chosen for every template, shape (..., 35, 2).
+    """
+    return get_templates().shifted_distances(images, max_shift)
+
+
+def get_top_k(images: list[np.ndarray] | np.ndarray, k: int = 3) -> list[list[tuple[str, float]]]:
+    """The k closest characters (with distances) of each character image."""
+    indices, distances = get_templates().top_k(get_distances(images), k)
+    return [
+        [(key[i], float(d)) for i, d in zip(row_i, row_d)]
+        for row_i, row_d in zip(indices.reshape(-1, k), distances.reshape(-1, k))
+    ]
+
+
+def get_characters(images: list[np.ndarray] | np.ndarray, max_shift: int = 0) -> str:
+    """
+    Get the characters represented by all images in one batch.
+    With `max_shift`, every image is also compared at ±max_shift pixel offsets.
+    """
+    if max_shift:
+        distances, _ = get_shifted_distances(images, max_shift)
+    else:
+        distances = get_distances(images)
+    return get_templates().decode(np.argmin(distances, axis=-1))
 
 
-def get_character(image: np.ndarray) -> str:
+def get_character(image: np.ndarray, max_shift: int = 0) -> str:
     """Get the character represented by the image."""
-    # Resize the image to 22x22 and place it in the middle of a 22x22 canvas
-    canva = np.zeros((22, 22), dtype=np.uint8)
-    h, w = image.shape
-    canva[(22 - h) // 2:(22 - h) // 2 + h, (22 - w) // 2:(22 - w) // 2 + w] = image
-    # Compute the distances to all character templates
-    distances = [eucdist(canva, template) for template in table]
-    # Find the index of the minimum distance
-    min_index = np.argmin(distances)
-    return key[min_index]
+    # Place the image in the middle of a 22x22 canvas and compare with all templates
+    return get_characters(to_canvas([image]), max_shift)
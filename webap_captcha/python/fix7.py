@@ -11,6 +11,7 @@ from uuid import uuid4
 from glob import glob
 
 import segment
+import template_bank
 import utils
 import eucdist
 
@@ -22,7 +23,7 @@ images = [
 for answer, path in images:
     img = Image.open(path)
     img_bin = np.array(img)
-    img_bin = utils.binarize_image(np.array(img), 138)
+    img_bin = utils.binarize_image(np.array(img), utils.THRESHOLD)
     labels_im, num_labels = segment.label(img_bin, background=255)
     result = segment.segment_characters(labels_im, num_labels)
 
@@ -66,12 +67,13 @@ final = final // 1
 print(final)
 
 Image.fromarray(np.where(final >= 153, 255, 0).astype(np.uint8)).save("assets/7.bmp")
+template_bank.build()
 
 
 # test
 for ans, path in images:
     img = np.array(Image.open(path))
-    img_bin = utils.binarize_image(np.array(img), 138)
+    img_bin = utils.binarize_image(np.array(img), utils.THRESHOLD)
     labels_im, num_labels = segment.label(img_bin, background=255)
     chars = segment.segment_characters(labels_im, num_labels)
 
@@ -87,7 +89,7 @@ images = glob("test/eucdist/success/*.bmp") + glob("test/tflite/success/*.bmp")
 for path in images:
     ans = path.split("/")[-1].split(".")[0]
     img = np.array(Image.open(path))
-    img_bin = utils.binarize_image(np.array(img), 138)
+    img_bin = utils.binarize_image(np.array(img), utils.THRESHOLD)
     labels_im, num_labels = segment.label(img_bin, background=255)
     chars = segment.segment_characters(labels_im, num_labels)
 
@@ -72,7 +72,7 @@ images = [
 
 for ans, path in images:
     img = np.array(Image.open(path))
-    img_bin = utils.binarize_image(np.array(img), 138)
+    img_bin = utils.binarize_image(np.array(img), utils.THRESHOLD)
     labels_im, num_labels = segment.label(img_bin, background=255)
     chars = segment.segment_characters(labels_im, num_labels)
 
@@ -88,7 +88,7 @@ images = glob("test/eucdist/success/*.bmp") + glob("test/tflite/success/*.bmp")
 for path in images:
     ans = path.split("/")[-1].split(".")[0]
     img = np.array(Image.open(path))
-    img_bin = utils.binarize_image(np.array(img), 138)
+    img_bin = utils.binarize_image(np.array(img), utils.THRESHOLD)
     labels_im, num_labels = segment.label(img_bin, background=255)
     chars = segment.segment_characters(labels_im, num_labels)
 
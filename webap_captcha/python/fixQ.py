@@ -6,6 +6,7 @@ from uuid import uuid4
 
 import utils
 import segment
+import template_bank
 import tflite
 
 paths = glob("test/eucdist/failed/*.bmp")
@@ -21,7 +22,7 @@ for path in paths:
     if captcha_answer != name.replace("O", "Q"):
         continue
 
-    img_bin = utils.binarize_image(np.array(img), 138)
+    img_bin = utils.binarize_image(np.array(img), utils.THRESHOLD)
     labels_im, num_labels = segment.label(img_bin, background=255)
     result = segment.segment_characters(labels_im, num_labels)
 
@@ -64,3 +65,4 @@ avgfixq = avgfixq / len(FixQ)
 final = (avgq + avgfixq) // 2
 
 Image.fromarray(np.where(final >= 128, 255, 0).astype(np.uint8)).save("assets/Q.bmp")
+template_bank.build()
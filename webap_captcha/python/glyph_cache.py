@@ -0,0 +1,141 @@
+"""
+字元快取：同一個字型的字元切出來常常一模一樣，
+以切圖的 bit-packed 雜湊對應到登入成功（perchk.jsp）確認過的字元，命中時就不必計算距離。
+
+    cache = GlyphCache(path=CACHE_PATH)
+    solver = CaptchaSolver("cached", cache=cache)
+    result = solver.solve(image)
+    ...  # POST perchk.jsp
+    if "驗證碼錯誤" not in response.text:
+        cache.confirm(result)
+    cache.save()
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, TypedDict
+
+import numpy as np
+
+_VERSION = 1
+CACHE_PATH = Path(__file__).resolve().parent / "assets" / "glyph_cache.json"
+
+
+class CacheStats(TypedDict):
+    hits: int
+    misses: int
+    inserts: int  # new keys
+    updates: int  # existing keys whose character changed
+    evictions: int
+
+
+def glyph_key(crop: np.ndarray) -> str:
+    """Hash of the crop's shape and foreground bits; equal crops share a key."""
+    h, w = crop.shape
+    bits = np.packbits(np.asarray(crop) != 0)
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(h.to_bytes(2, "little") + w.to_bytes(2, "little"))
+    digest.update(bits.tobytes())
+    return digest.hexdigest()
+
+
+class GlyphCache:
+    """
+    Bounded LRU map from `glyph_key` to a confirmed character.
+
+    Entries only come from confirmed labels (`confirm`, `update`), so the
+    cache never learns from its own guesses. `path` is read when the cache is created and written by `save`.
+    """
+
+    def __init__(self, capacity: int = 4096, path: Path | None = None):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive. Got {capacity}")
+        self.capacity = capacity
+        self.path = path
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: CacheStats = {
+            "hits": 0,
+            "misses": 0,
+            "inserts": 0,
+            "updates": 0,
+            "evictions": 0,
+        }
+        if path is not None and path.exists():
+            data = json.loads(path.read_text())
+            if data.get("version") != _VERSION:
+                raise ValueError(f"Unsupported glyph cache version in {path}")
+            self._entries.update(data["glyphs"])
+            while len(self._entries) > capacity:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def get(self, key: str) -> str | None:
+        """The confirmed character of a key, counted as a hit or a miss."""
+        with self._lock:
+            char = self._entries.get(key)
+            if char is None:
+                self.stats["misses"] += 1
+            else:
+                self.stats["hits"] += 1
+                self._entries.move_to_end(key)
+            return char
+
+    def put(self, key: str, char: str) -> None:
+        with self._lock:
+            old = self._entries.get(key)
+            if old is None:
+                self.stats["inserts"] += 1
+            elif old != char:
+                self.stats["updates"] += 1
+            self._entries[key] = char
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def confirm(self, result: dict) -> int:
+        """
+        Store the glyphs of a `SolveResult` whose text was accepted by the
+        server. Returns the number of glyphs stored; results solved without
+        the cache (no glyph keys) store nothing.
+        """
+        if not result["ok"]:
+            return 0
+        stored = 0
+        for glyph in result["glyphs"]:
+            if "key" in glyph:
+                self.put(glyph["key"], glyph["char"])
+                stored += 1
+        return stored
+
+    def update(self, items: Iterable[tuple[np.ndarray, str]]) -> None:
+        """Store (crop, char) pairs, e.g. from a labeled captcha set."""
+        for crop, char in items:
+            self.put(glyph_key(crop), char)
+
+    def save(self, path: Path | None = None) -> Path:
+        """Write the entries, least recently used first, to `path` (default `self.path`)."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("GlyphCache has no path to save to")
+        with self._lock:
+            data = json.dumps({"version": _VERSION, "glyphs": self._entries})
+
+        # 先寫入暫存檔再替換，避免其他行程讀到寫到一半的檔案
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(data)
+        os.replace(tmp, path)
+        return path
@@ -0,0 +1,52 @@
+"""
+Hamming distance: 字元與模板都是 0/255 的 22x22 圖片，
+打包成 484 bit（8 個 uint64）後以 XOR + popcount 比對。
+"""
+
+from functools import cache
+
+import numpy as np
+
+import template_bank
+from matcher import CANVAS_SIZE, to_canvas
+
+key = template_bank.KEY
+
+# 484 bits -> 61 bytes, padded to 64 bytes = 8 uint64 words
+_PACKED_BYTES = 64
+
+
+def pack(images: np.ndarray) -> np.ndarray:
+    """Pack (..., 22, 22) binary images into (..., 8) uint64 bit vectors."""
+    images = np.asarray(images)
+    batch_shape = images.shape[:-2]
+    bits = images.reshape(-1, CANVAS_SIZE * CANVAS_SIZE) > 0
+    packed = np.zeros((bits.shape[0], _PACKED_BYTES), dtype=np.uint8)
+    packed[:, : (bits.shape[1] + 7) // 8] = np.packbits(bits, axis=1)
+    return packed.view(np.uint64).reshape(*batch_shape, _PACKED_BYTES // 8)
+
+
+@cache
+def get_packed_table() -> np.ndarray:
+    """Packed templates, shape (35, 8), built from the compiled bank on first use."""
+    return pack(template_bank.load().glyphs)
+
+
+def get_distances(images: list[np.ndarray] | np.ndarray) -> np.ndarray:
+    """Number of differing pixels to every template, shape (..., 35)."""
+    if not isinstance(images, np.ndarray):
+        images = to_canvas(images)
+    packed = pack(images)
+    diff = np.bitwise_xor(packed[..., np.newaxis, :], get_packed_table())
+    return np.bitwise_count(diff).sum(axis=-1, dtype=np.int32)
+
+
+def get_characters(images: list[np.ndarray] | np.ndarray) -> str:
+    """Get the characters represented by all images in one batch."""
+    indices = np.argmin(get_distances(images), axis=-1)
+    return "".join(key[i] for i in indices.ravel())
+
+
+def get_character(image: np.ndarray) -> str:
+    """Get the character represented by the image."""
+    return get_characters([image])
@@ -0,0 +1,168 @@
+"""
+背景寫入除錯用的驗證碼圖片：登入迴圈只把原始 BMP bytes 放進有上限的佇列，
+由另一個執行緒批次寫入磁碟（或附加到單一 zip 檔），磁碟延遲不會卡住登入。
+
+    with ImageSink(archive="captchas.zip") as sink:
+        ...
+        sink.put(f"test/eucdist/success/{answer}.bmp", response.content)
+    print(sink.stats)
+"""
+
+from __future__ import annotations
+import os
+import queue
+import random
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import TypedDict
+
+from utils import DebugSink
+
+
+class SinkStats(TypedDict):
+    queued: int  # accepted by `put`
+    written: int
+    dropped: int  # rejected because the queue was full
+    sampled_out: int  # shed by `sample_rate` under backpressure
+    errors: int  # failed writes
+    batches: int
+
+
+class ImageSink:
+    """
+    Write images from a bounded queue on a daemon writer thread.
+
+    - `put` never blocks. Under backpressure, once `shed_above` images are
+      pending (default half of `max_queue`), only a `sample_rate` share of
+      new images is kept, so the queue rarely fills; when `max_queue`
+      images are pending the rest are dropped. Below `shed_above` every
+      image is kept, whatever `sample_rate` is.
+    - The writer takes up to `batch_size` images at a time, waiting at most
+      `flush_interval` seconds for a batch to fill.
+    - With `archive`, images are appended to one zip file (stored, not
+      compressed) under their path instead of being written as files;
+      the archive is complete once `close` returns.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 1024,
+        batch_size: int = 64,
+        flush_interval: float = 0.5,
+        sample_rate: float = 1.0,
+        archive: str | os.PathLike | None = None,
+        seed: int | None = None,
+        shed_above: int | None = None,
+    ):
+        if max_queue <= 0 or batch_size <= 0:
+            raise ValueError("max_queue and batch_size must be positive")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_rate = sample_rate
+        self.shed_above = max_queue // 2 if shed_above is None else shed_above
+        self.archive = Path(archive) if archive is not None else None
+
+        self.stats: SinkStats = {
+            "queued": 0,
+            "written": 0,
+            "dropped": 0,
+            "sampled_out": 0,
+            "errors": 0,
+            "batches": 0,
+        }
+        self._queue: queue.Queue[tuple[str, bytes] | None] = queue.Queue(max_queue)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._zip = zipfile.ZipFile(self.archive, "a") if self.archive else None
+        self._thread = threading.Thread(target=self._run, name="ImageSink", daemon=True)
+        self._thread.start()
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += n
+
+    def put(self, path: str | os.PathLike, data: bytes) -> bool:
+        """Queue `data` to be written to `path`; False if it was skipped or dropped."""
+        if self._closed:
+            raise RuntimeError("ImageSink is closed")
+        # 只有寫入跟不上、佇列開始堆積時才取樣
+        if (
+            self.sample_rate < 1.0
+            and self._queue.qsize() >= self.shed_above
+            and self._random.random() >= self.sample_rate
+        ):
+            self._count("sampled_out")
+            return False
+        try:
+            self._queue.put_nowait((os.fspath(path), data))
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("queued")
+        return True
+
+    def to(self, path: str | os.PathLike) -> DebugSink:
+        """A `utils.DebugSink` writing to `path`, e.g. for `get_captcha_image`."""
+        return lambda data: self.put(path, data)
+
+    def _run(self) -> None:
+        done = False
+        while not done:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(timeout, 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: list[tuple[str, bytes]]) -> None:
+        written = 0
+        for path, data in batch:
+            try:
+                if self._zip is not None:
+                    self._zip.writestr(path, data)
+                else:
+                    Path(path).parent.mkdir(parents=True, exist_ok=True)
+                    with open(path, "wb") as f:
+                        f.write(data)
+                written += 1
+            except Exception:
+                # 任何一張圖片寫入失敗都不能讓寫入執行緒結束，否則佇列會塞滿
+                self._count("errors")
+        self._count("written", written)
+        self._count("batches")
+
+    def close(self) -> None:
+        """Write the pending images and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        # 寫入執行緒意外結束時佇列可能是滿的，不能一直等待空位
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+        if self._zip is not None:
+            self._zip.close()
+
+    def __enter__(self) -> ImageSink:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
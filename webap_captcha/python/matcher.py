@@ -0,0 +1,156 @@
+"""
+向量化的模板比對：把所有字元模板堆成一個 (35, 484) 矩陣，
+一次計算整批字元對所有模板的距離或相似度。
+"""
+
+from __future__ import annotations
+from typing import Iterable, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+CANVAS_SIZE = 22
+
+
+def to_canvas(images: Iterable[np.ndarray]) -> np.ndarray:
+    """
+    Place each cropped character in the middle of a 22x22 canvas.
+    Returns an (N, 22, 22) uint8 array.
+    """
+    images = list(images)
+    canvas = np.zeros((len(images), CANVAS_SIZE, CANVAS_SIZE), dtype=np.uint8)
+    for canva, image in zip(canvas, images):
+        h, w = image.shape
+        y, x = (CANVAS_SIZE - h) // 2, (CANVAS_SIZE - w) // 2
+        canva[y : y + h, x : x + w] = image
+    return canvas
+
+
+class TemplateMatcher:
+    """
+    Score glyphs against every template at once.
+
+    Glyphs are either a list of cropped characters (centered with `to_canvas`)
+    or an array of canvases with shape (..., 22, 22); scores keep the leading
+    dimensions, e.g. (B, 4, 22, 22) -> (B, 4, 35) for a batch of captchas.
+    All products are computed in int64, so 0..255 pixels never wrap around.
+    Contiguous int64 templates (e.g. `template_bank.load().wide`) are used
+    as they are, so processes mapping the same bank share its pages; other
+    templates are converted into a private copy.
+    """
+
+    def __init__(self, key: str, templates: Sequence[np.ndarray] | np.ndarray):
+        if len(key) != len(templates):
+            raise ValueError(f"Got {len(templates)} templates for {len(key)} keys")
+        self.key = key
+        if (
+            isinstance(templates, np.ndarray)
+            and templates.dtype == np.int64
+            and templates.flags.c_contiguous
+        ):
+            self.matrix = templates.reshape(len(templates), -1)
+        else:
+            self.matrix = np.stack(
+                [np.asarray(t, dtype=np.int64).ravel() for t in templates]
+            )
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        self.norms = np.sqrt(self.sq_norms)
+
+    def _flatten(
+        self, glyphs: np.ndarray | Iterable[np.ndarray]
+    ) -> tuple[np.ndarray, tuple[int, ...]]:
+        if not isinstance(glyphs, np.ndarray):
+            glyphs = to_canvas(glyphs)
+        batch_shape = glyphs.shape[:-2]
+        flat = glyphs.reshape(-1, glyphs.shape[-2] * glyphs.shape[-1])
+        if flat.shape[1] != self.matrix.shape[1]:
+            raise ValueError(
+                f"Glyphs must be {CANVAS_SIZE}x{CANVAS_SIZE}. Got {glyphs.shape[-2:]}"
+            )
+        return flat.astype(np.int64), batch_shape
+
+    def squared_distances(
+        self, glyphs: np.ndarray | Iterable[np.ndarray]
+    ) -> np.ndarray:
+        """Exact squared Euclidean distances, shape (..., len(key))."""
+        flat, batch_shape = self._flatten(glyphs)
+        sq = np.einsum("ij,ij->i", flat, flat)[:, np.newaxis]
+        result = sq + self.sq_norms - 2 * (flat @ self.matrix.T)
+        return result.reshape(*batch_shape, len(self.key))
+
+    def distances(self, glyphs: np.ndarray | Iterable[np.ndarray]) -> np.ndarray:
+        """Euclidean distances, shape (..., len(key))."""
+        return np.sqrt(self.squared_distances(glyphs))
+
+    def shifted_squared_distances(
+        self, glyphs: np.ndarray | Iterable[np.ndarray], max_shift: int = 1
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Squared Euclidean distances minimized over every translation of the
+        glyph within ±max_shift pixels, shape (..., len(key)).
+
+        Also returns the (dy, dx) each glyph was moved by to reach the minimum,
+        shape (..., len(key), 2). Pixels moved out of the canvas are dropped.
+        Ties prefer the unshifted glyph, so a shift is only reported when it
+        is strictly closer.
+        """
+        flat, batch_shape = self._flatten(glyphs)
+        canvas = flat.reshape(-1, CANVAS_SIZE, CANVAS_SIZE)
+        side = 2 * max_shift + 1
+
+        # (N, side, side, 22, 22) view of every shifted canvas, flattened into
+        # one (N * side * side, 484) matrix so all offsets and templates are a
+        # single matrix product
+        padded = np.pad(canvas, ((0, 0), (max_shift, max_shift), (max_shift, max_shift)))
+        windows = sliding_window_view(padded, (CANVAS_SIZE, CANVAS_SIZE), axis=(1, 2))
+        shifted = windows.reshape(-1, CANVAS_SIZE * CANVAS_SIZE)
+
+        sq = np.einsum("ij,ij->i", shifted, shifted)[:, np.newaxis]
+        result = (sq + self.sq_norms - 2 * (shifted @ self.matrix.T)).reshape(
+            len(canvas), side * side, len(self.key)
+        )
+        distances = result.min(axis=1)
+        center = side * side // 2
+        best = np.where(
+            result[:, center] == distances, center, result.argmin(axis=1)
+        )
+
+        # window (a, b) moves the glyph by (max_shift - a, max_shift - b)
+        offsets = max_shift - np.stack(np.divmod(best, side), axis=-1)
+        return (
+            distances.reshape(*batch_shape, len(self.key)),
+            offsets.reshape(*batch_shape, len(self.key), 2),
+        )
+
+    def shifted_distances(
+        self, glyphs: np.ndarray | Iterable[np.ndarray], max_shift: int = 1
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Euclidean version of `shifted_squared_distances`."""
+        sq, offsets = self.shifted_squared_distances(glyphs, max_shift)
+        return np.sqrt(sq), offsets
+
+    def similarities(self, glyphs: np.ndarray | Iterable[np.ndarray]) -> np.ndarray:
+        """Cosine similarities, shape (..., len(key)); 0 when a norm is 0."""
+        flat, batch_shape = self._flatten(glyphs)
+        norms = np.sqrt(np.einsum("ij,ij->i", flat, flat))[:, np.newaxis]
+        denominator = norms * self.norms
+        dot = (flat @ self.matrix.T).astype(np.float64)
+        result = np.divide(
+            np.abs(dot), denominator, out=np.zeros_like(dot), where=denominator != 0
+        )
+        return result.reshape(*batch_shape, len(self.key))
+
+    def top_k(
+        self, scores: np.ndarray, k: int = 1, largest: bool = False
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Indices and scores of the k best templates along the last axis,
+        best first. Ties keep template order, like np.argmin/np.argmax.
+        """
+        order = np.argsort(-scores if largest else scores, axis=-1, kind="stable")
+        indices = order[..., :k]
+        return indices, np.take_along_axis(scores, indices, axis=-1)
+
+    def decode(self, indices: np.ndarray) -> str:
+        """Map template indices back to characters."""
+        return "".join(self.key[i] for i in np.asarray(indices).ravel())
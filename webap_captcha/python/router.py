@@ -0,0 +1,130 @@
+"""
+依照即時的成功率與延遲，在多個 CaptchaSolver 之間分配流量（epsilon-greedy bandit）。
+
+    router = BackendRouter(["eucdist", "cossim", "tflite"])
+    name, result = router.solve(image)
+    ...  # POST perchk.jsp
+    router.report(name, "驗證碼錯誤" not in response.text, round_trip=seconds_spent_on_http)
+"""
+
+from __future__ import annotations
+import random
+import threading
+from time import perf_counter
+from typing import Iterable, TypedDict
+
+import numpy as np
+
+from solver import CaptchaSolver, SolveResult
+
+
+class BackendStats(TypedDict):
+    attempts: float  # decayed number of reported logins
+    successes: float  # decayed number of successful logins
+    latency: float  # exponential moving average of the solve time in seconds
+    solves: int  # total number of solves, never decayed
+
+
+class BackendRouter:
+    """
+    Route captchas to the backend with the best expected successful logins
+    per second, `success_rate / (overhead + latency)`.
+
+    - success_rate uses a Beta(1, 1) prior and counts discounted by `decay`
+      on every report, so the estimate follows the day's captcha noise.
+    - latency is an exponential moving average with weight `alpha`.
+    - `overhead` is the non-solving cost of one login attempt, the
+      index.html -> validateCode.jsp -> perchk.jsp round trips, which every
+      wrong captcha pays again. It starts at the given estimate and follows
+      the `round_trip` times passed to `report` (same `alpha`). Without it
+      the router would rank solves per second and favour a fast backend
+      that is often wrong.
+    - With probability `exploration` a random backend is used instead.
+    """
+
+    def __init__(
+        self,
+        solvers: Iterable[str] | dict[str, CaptchaSolver] = ("eucdist", "cossim", "tflite"),
+        exploration: float = 0.05,
+        decay: float = 0.99,
+        alpha: float = 0.1,
+        overhead: float = 0.3,
+        seed: int | None = None,
+    ):
+        if not isinstance(solvers, dict):
+            solvers = {name: CaptchaSolver(name) for name in solvers}
+        if not solvers:
+            raise ValueError("BackendRouter needs at least one solver")
+
+        self.solvers = solvers
+        self.exploration = exploration
+        self.decay = decay
+        self.alpha = alpha
+        self.overhead = overhead
+
+        self.stats: dict[str, BackendStats] = {
+            name: {"attempts": 0.0, "successes": 0.0, "latency": 0.0, "solves": 0}
+            for name in solvers
+        }
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def success_rate(self, name: str) -> float:
+        stats = self.stats[name]
+        return (stats["successes"] + 1.0) / (stats["attempts"] + 2.0)
+
+    def expected_rate(self, name: str) -> float:
+        """Expected successful logins per second of a backend."""
+        stats = self.stats[name]
+        return self.success_rate(name) / max(self.overhead + stats["latency"], 1e-9)
+
+    def choose(self) -> str:
+        with self._lock:
+            untried = [name for name, stats in self.stats.items() if stats["solves"] == 0]
+            if untried:
+                return untried[0]
+            if self._random.random() < self.exploration:
+                return self._random.choice(list(self.solvers))
+            return max(self.solvers, key=self.expected_rate)
+
+    def solve(self, image: np.ndarray) -> tuple[str, SolveResult]:
+        """Solve with the chosen backend; report the login outcome with `report`."""
+        name = self.choose()
+        start = perf_counter()
+        result = self.solvers[name].solve(image)
+        self.record_latency(name, perf_counter() - start)
+        return name, result
+
+    def record_latency(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.stats[name]
+            if stats["solves"] == 0:
+                stats["latency"] = seconds
+            else:
+                stats["latency"] += self.alpha * (seconds - stats["latency"])
+            stats["solves"] += 1
+
+    def report(self, name: str, success: bool, round_trip: float | None = None) -> None:
+        """
+        Feed back the login outcome, e.g. `"驗證碼錯誤" not in response.text`,
+        and the seconds its HTTP requests took (without the solve).
+        Captchas that could not be solved should be reported as failures.
+        """
+        with self._lock:
+            if round_trip is not None:
+                self.overhead += self.alpha * (round_trip - self.overhead)
+            stats = self.stats[name]
+            stats["attempts"] = stats["attempts"] * self.decay + 1.0
+            stats["successes"] = stats["successes"] * self.decay + (1.0 if success else 0.0)
+
+    def export(self) -> dict[str, dict[str, float]]:
+        """A JSON-serializable snapshot of the router state."""
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "success_rate": self.success_rate(name),
+                    "expected_rate": self.expected_rate(name),
+                }
+                for name, stats in self.stats.items()
+            }
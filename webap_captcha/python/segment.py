@@ -1,5 +1,8 @@
 import numpy as np
-from typing import Iterable, TypedDict
+from typing import Iterable, Literal, Sequence, TypedDict
+
+import utils
+from matcher import CANVAS_SIZE
 
 
 def label(
@@ -26,6 +29,7 @@ def label(
     - 採單向掃描（C-order，最後一維最內層），僅使用「在掃描順序上已出現」的鄰域（因果鄰域）。
     - 使用 Union-Find（帶路徑壓縮）合併等價標籤。
     - 第二趟遍歷將每個標籤壓縮到其根，並重編成連續 1..N。
+    - 2D 輸入會自動改用 `_label_2d` 快速路徑，輸出與通用實作完全相同。
     """
     a = np.asarray(input)
     if a.ndim == 0 or a.size == 0:
@@ -46,8 +50,21 @@ def label(
     # 計算「因果鄰域」的偏移（只包含掃描順序上已處理到的鄰居）
     neighbor_offsets = _compute_causal_neighbor_offsets(structure)
 
+    if a.ndim == 2:
+        return _label_2d(foreground, neighbor_offsets, dtype)
+    return _label_nd(foreground, neighbor_offsets, dtype)
+
+
+def _label_nd(
+    foreground: np.ndarray,
+    neighbor_offsets: list[tuple[int, ...]],
+    dtype: np.dtype,
+) -> tuple[np.ndarray, int]:
+    """
+    通用的 ND 實作：以 np.ndindex 逐點掃描。
+    """
     # 輸出標籤陣列（先全部 0）
-    labels = np.zeros(a.shape, dtype=dtype)
+    labels = np.zeros(foreground.shape, dtype=dtype)
 
     # Union-Find 結構（標籤從 1 開始）
     parent: list[int] = [0]  # parent[0] 無用佔位，使索引與標籤一致
@@ -85,7 +102,7 @@ def label(
 
     # 第一趟：指派臨時標籤並收集等價合併
     # 依 C-order 掃描（np.ndindex 即為 row-major）
-    shape = a.shape
+    shape = foreground.shape
     for idx in np.ndindex(shape):
         if not foreground[idx]:
             continue
@@ -147,6 +164,85 @@ def label(
     num_features = len(root_set)
     return labels, num_features
 
+def _label_2d(
+    foreground: np.ndarray,
+    neighbor_offsets: list[tuple[int, ...]],
+    dtype: np.dtype,
+) -> tuple[np.ndarray, int]:
+    """
+    2D 專用的快速路徑，結果與 `_label_nd` 完全相同。
+
+    - 每列先以 np.flatnonzero 取出前景欄位，跳過背景。
+    - 標籤以左右各補一格 0 的 Python list 儲存，省去邊界檢查與 tuple 運算。
+    - 臨時標籤的建立順序、Union-Find 的合併順序（含 rank）皆與 `_label_nd` 相同，
+      因此最後重編的 1..N 也完全一致。
+    - 內部以 int32 儲存，最後才轉成指定的 dtype。
+    """
+    height, width = foreground.shape
+
+    # (是否為上一列, 補 0 後的欄位位移)，保持 neighbor_offsets 的順序
+    neighbors = [(dy == -1, dx + 1) for dy, dx in neighbor_offsets]
+
+    parent: list[int] = [0]
+    rank: list[int] = [0]
+
+    def uf_find(x: int) -> int:
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != x:
+            x, parent[x] = parent[x], root
+        return root
+
+    rows: list[list[int]] = []
+    prev = [0] * (width + 2)
+    for y in range(height):
+        cur = [0] * (width + 2)
+        for x in np.flatnonzero(foreground[y]).tolist():
+            m = 0
+            neighbor_labels: list[int] = []
+            for is_up, dx in neighbors:
+                lab = prev[x + dx] if is_up else cur[x + dx]
+                if lab:
+                    neighbor_labels.append(lab)
+                    if m == 0 or lab < m:
+                        m = lab
+
+            if m == 0:
+                m = len(parent)
+                parent.append(m)
+                rank.append(0)
+            else:
+                for l in neighbor_labels:
+                    if l == m:
+                        continue
+                    rx, ry = uf_find(m), uf_find(l)
+                    if rx == ry:
+                        continue
+                    if rank[rx] < rank[ry]:
+                        parent[rx] = ry
+                    elif rank[rx] > rank[ry]:
+                        parent[ry] = rx
+                    else:
+                        parent[ry] = rx
+                        rank[rx] += 1
+            cur[x + 1] = m
+        rows.append(cur)
+        prev = cur
+
+    num_provisional = len(parent) - 1
+    if num_provisional == 0:
+        return np.zeros((height, width), dtype=dtype), 0
+
+    # 每個臨時標籤都至少用於一個像素；依根的大小重編成 1..N
+    roots = np.array([uf_find(lab) for lab in range(1, num_provisional + 1)])
+    root_set, compact = np.unique(roots, return_inverse=True)
+    lut = np.zeros(num_provisional + 1, dtype=np.int32)
+    lut[1:] = compact + 1
+
+    labels = lut[np.array(rows, dtype=np.int32)[:, 1:-1]]
+    return labels.astype(dtype, copy=False), len(root_set)
+
 
 # -----------------------------
 # 工具函式
@@ -243,26 +339,187 @@ def _in_bounds(idx: tuple[int, ...], shape: tuple[int, ...]) -> bool:
 class BBox(TypedDict):
     label: int
     bbox: tuple[int, int, int, int]  # (x_min, y_min, x_max, y_max)
+    area: int  # number of pixels
 
 
-def segment_characters(labels_img: np.ndarray, num_labels: int) -> list[np.ndarray]:
-    bboxes: list[BBox] = []
-    for i in range(1, num_labels + 1):
-        ys, xs = np.where(labels_img == i)
+def find_objects(labels_img: np.ndarray, num_labels: int) -> np.ndarray:
+    """
+    Collect the bounding box and pixel count of every label in one pass.
 
-        if len(xs) == 0 or len(ys) == 0:
-            continue
+    Returns an (num_labels, 5) int array whose row `i - 1` is
+    (x_min, y_min, x_max, y_max, area) of label `i`.
+    Labels without any pixel have area 0 and meaningless extents.
+    """
+    ys, xs = np.nonzero((labels_img > 0) & (labels_img <= num_labels))
+    labs = labels_img[ys, xs].astype(np.intp)
 
-        x_min, x_max = xs.min(), xs.max()
-        y_min, y_max = ys.min(), ys.max()
+    table = np.empty((num_labels + 1, 5), dtype=np.intp)
+    table[:, 0:2] = np.iinfo(np.intp).max
+    table[:, 2:4] = -1
+    np.minimum.at(table[:, 0], labs, xs)
+    np.minimum.at(table[:, 1], labs, ys)
+    np.maximum.at(table[:, 2], labs, xs)
+    np.maximum.at(table[:, 3], labs, ys)
+    table[:, 4] = np.bincount(labs, minlength=num_labels + 1)
 
-        # filter small components
-        if x_max - x_min < 5 or y_max - y_min < 5:
-            continue
+    return table[1:]
 
-        bboxes.append({"label": i, "bbox": (x_min, y_min, x_max, y_max)})
 
-    bboxes = sorted(bboxes, key=lambda x: x["bbox"][0])
+def _is_large_enough(bbox: tuple[int, int, int, int]) -> bool:
+    x_min, y_min, x_max, y_max = bbox
+    return x_max - x_min >= 5 and y_max - y_min >= 5
+
+
+class _ColumnHistogram:
+    """
+    Row-wise cumulative foreground counts, so the column histogram of any
+    bbox costs O(width) instead of re-scanning its pixels.
+    """
+
+    def __init__(self, foreground: np.ndarray):
+        self.cum = np.zeros((foreground.shape[0] + 1, foreground.shape[1]), dtype=np.int32)
+        np.cumsum(foreground, axis=0, out=self.cum[1:])
+
+    def columns(self, bbox: tuple[int, int, int, int]) -> np.ndarray:
+        x_min, y_min, x_max, y_max = bbox
+        return self.cum[y_max + 1, x_min : x_max + 1] - self.cum[y_min, x_min : x_max + 1]
+
+    def tighten(self, bbox: tuple[int, int, int, int]) -> tuple[int, int, int, int] | None:
+        """Shrink a bbox to the foreground pixels inside it."""
+        x_min, y_min, x_max, y_max = bbox
+        cols = np.flatnonzero(self.columns(bbox))
+        if cols.size == 0:
+            return None
+        x_min, x_max = x_min + int(cols[0]), x_min + int(cols[-1])
+        window = self.cum[y_min : y_max + 2, x_min : x_max + 1]
+        rows = np.flatnonzero(np.diff(window, axis=0).sum(axis=1))
+        return x_min, y_min + int(rows[0]), x_max, y_min + int(rows[-1])
+
+
+def repair_bboxes(
+    labels_img: np.ndarray,
+    table: np.ndarray,
+    count: int = 4,
+    min_area: int = 3,
+    max_size: int = 22,
+    max_width: int = 19,
+) -> list[BBox] | None:
+    """
+    Try to turn the components of a failed segmentation into exactly `count` characters.
+
+    1. Fragments (area >= `min_area`) whose columns overlap by at least half of
+       the narrower one are merged, as long as the result is at most
+       `max_size` pixels tall: a character broken into an upper and lower part.
+       A fragment below the size filter of `segment_characters` is only merged
+       with other such fragments (e.g. the halves of a broken I), never into a
+       component that passes it, so noise specks do not grow a glyph's bbox.
+    2. Components are filtered by size like `segment_characters`.
+    3. While there are too few characters, the widest component wider than
+       `max_width` (the widest template glyph, W) is split at the column with
+       the fewest foreground pixels in its middle 40%: two fused characters.
+       A component that could be one glyph is never split.
+    4. Every resulting character must fit in `max_size` x `max_size`.
+
+    Returns the bboxes sorted by x, or None when the repair did not succeed.
+    """
+    hist = _ColumnHistogram(labels_img > 0)
+
+    parts: list[tuple[int, list[int], int]] = [  # (label, bbox, area)
+        (int(i) + 1, [int(v) for v in table[i, :4]], int(table[i, 4]))
+        for i in np.flatnonzero(table[:, 4] >= min_area)
+    ]
+    parts.sort(key=lambda p: p[1][0])
+
+    # 1. 合併上下重疊的碎片；小於大小過濾的碎片只和彼此合併
+    merged: list[tuple[int, list[int], int]] = []
+    for label, bbox, area in parts:
+        small = not _is_large_enough(tuple(bbox))
+        for j, (m_label, m_bbox, m_area) in enumerate(merged):
+            if small != (not _is_large_enough(tuple(m_bbox))):
+                continue
+            overlap = min(bbox[2], m_bbox[2]) - max(bbox[0], m_bbox[0]) + 1
+            narrower = min(bbox[2] - bbox[0], m_bbox[2] - m_bbox[0]) + 1
+            union = [
+                min(bbox[0], m_bbox[0]),
+                min(bbox[1], m_bbox[1]),
+                max(bbox[2], m_bbox[2]),
+                max(bbox[3], m_bbox[3]),
+            ]
+            if overlap * 2 >= narrower and union[3] - union[1] < max_size:
+                merged[j] = (m_label if m_area >= area else label, union, m_area + area)
+                break
+        else:
+            merged.append((label, bbox, area))
+
+    # 2. 與 segment_characters 相同的大小過濾
+    boxes = [
+        (label, tuple(bbox), area) for label, bbox, area in merged if _is_large_enough(bbox)
+    ]
+
+    # 3. 切開比任何單一字元都寬的元件
+    while 0 < len(boxes) < count:
+        widest = max(range(len(boxes)), key=lambda i: boxes[i][1][2] - boxes[i][1][0])
+        label, (x_min, y_min, x_max, y_max), _ = boxes[widest]
+        if x_max - x_min + 1 <= max_width:
+            break
+        columns = hist.columns((x_min, y_min, x_max, y_max))
+
+        # 只在中間 40% 的範圍內找（兩邊至少各留 5 px），
+        # 取投影最小的欄位，同分時取最接近中間的
+        width = columns.size
+        low, high = max(5, int(width * 0.3)), min(width - 5, int(np.ceil(width * 0.7)))
+        if low >= high:
+            break
+        candidates = np.arange(low, high)
+        center = (width - 1) / 2
+        split = int(min(candidates, key=lambda c: (columns[c], abs(c - center))))
+
+        halves = [
+            hist.tighten((x_min, y_min, x_min + split - 1, y_max)),
+            hist.tighten((x_min + split, y_min, x_max, y_max)),
+        ]
+        halves = [h for h in halves if h is not None and _is_large_enough(h)]
+        if len(halves) != 2:
+            break
+        boxes[widest : widest + 1] = [
+            (label, h, int(hist.columns(h).sum())) for h in halves
+        ]
+
+    if len(boxes) != count or any(
+        bbox[2] - bbox[0] >= max_size or bbox[3] - bbox[1] >= max_size
+        for _, bbox, _ in boxes
+    ):
+        return None
+
+    boxes.sort(key=lambda b: b[1][0])
+    return [{"label": label, "bbox": bbox, "area": area} for label, bbox, area in boxes]
+
+
+def segment_characters_with_bboxes(
+    labels_img: np.ndarray, num_labels: int, repair: bool = False
+) -> tuple[list[np.ndarray], list[BBox]]:
+    """
+    Same as `segment_characters`, but also returns the bbox of every crop.
+    """
+    table = find_objects(labels_img, num_labels)
+    x_min, y_min, x_max, y_max, area = table.T
+
+    # filter empty and small components
+    keep = (area > 0) & (x_max - x_min >= 5) & (y_max - y_min >= 5)
+    indices = np.flatnonzero(keep)
+    indices = indices[np.argsort(x_min[indices], kind="stable")]
+
+    bboxes: list[BBox] = [
+        {
+            "label": int(i) + 1,
+            "bbox": tuple(int(v) for v in table[i, :4]),
+            "area": int(table[i, 4]),
+        }
+        for i in indices
+    ]
+
+    if repair and len(bboxes) != 4:
+        bboxes = repair_bboxes(labels_img, table) or bboxes
 
     result: list[np.ndarray] = []
     for item in bboxes:
@@ -274,4 +531,68 @@ def segment_characters(labels_img: np.ndarray, num_labels: int) -> list[np.ndarr
 
         result.append(char)
 
+    return result, bboxes
+
+
+def segment_characters(
+    labels_img: np.ndarray, num_labels: int, repair: bool = False
+) -> list[np.ndarray]:
+    """
+    Crop the characters of a labeled image, sorted from left to right.
+    With `repair=True`, fused or broken characters are fixed with
+    `repair_bboxes` when the result is not 4 characters.
+    """
+    result, _ = segment_characters_with_bboxes(labels_img, num_labels, repair)
     return result
+
+
+# 138 放第一個：只要原本的門檻能用，結果就和以前一樣
+SWEEP_THRESHOLDS = (138, 132, 144, 126, 150)
+
+
+def is_plausible(chars: list[np.ndarray], count: int = 4) -> bool:
+    """Exactly `count` characters, each fitting the 22x22 template canvas."""
+    return len(chars) == count and all(
+        c.shape[0] <= CANVAS_SIZE and c.shape[1] <= CANVAS_SIZE for c in chars
+    )
+
+
+def segment_sweep(
+    image: np.ndarray,
+    thresholds: Sequence[int] = SWEEP_THRESHOLDS,
+    pick: Literal["first", "best"] = "first",
+    repair: bool = False,
+) -> tuple[list[np.ndarray], int | None]:
+    """
+    Binarize an RGB captcha with every threshold as one (K, H, W) stack,
+    then segment each slice until one yields four plausible characters.
+
+    - pick="first": the first threshold (in the given order) that works.
+    - pick="best": among the thresholds that work, the one with the fewest
+      connected components, i.e. the least noise and fewest fragments.
+
+    `repair` is passed to `segment_characters` for every threshold.
+
+    Returns the characters and the chosen threshold. When no threshold works,
+    the characters of the first threshold and None are returned.
+    """
+    stack = utils.binarize_sweep(image, thresholds)
+
+    fallback: list[np.ndarray] | None = None
+    best: tuple[int, list[np.ndarray], int] | None = None
+    for threshold, img_bin in zip(thresholds, stack):
+        labels_im, num_labels = label(img_bin, background=255)
+        chars = segment_characters(labels_im, num_labels, repair)
+        if fallback is None:
+            fallback = chars
+
+        if not is_plausible(chars):
+            continue
+        if pick == "first":
+            return chars, int(threshold)
+        if best is None or num_labels < best[0]:
+            best = (num_labels, chars, int(threshold))
+
+    if best is not None:
+        return best[1], best[2]
+    return fallback or [], None
@@ -0,0 +1,429 @@
+"""
+統一的驗證碼辨識介面：前處理、分割、比對都包在 CaptchaSolver 裡，
+模型與模板只載入一次，後端可替換（eucdist, cossim, hamming, tflite, tflite_numpy）。
+"""
+
+from __future__ import annotations
+from collections import Counter
+from functools import partial
+from time import perf_counter
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    NotRequired,
+    Protocol,
+    Sequence,
+    TypedDict,
+)
+
+import numpy as np
+
+import segment
+import tflite
+import utils
+from glyph_cache import GlyphCache, glyph_key
+
+DIGITS_COUNT = 4
+
+
+class GlyphScore(TypedDict):
+    char: str
+    score: float  # distance (eucdist, hamming), similarity (cossim) or probability (tflite)
+    margin: NotRequired[float]  # gap to the second-best template, template backends only
+    source: NotRequired[str]  # backend that produced the glyph, cascade only
+    offset: NotRequired[tuple[int, int]]  # (dy, dx) the glyph was moved by, max_shift only
+    key: NotRequired[str]  # glyph_cache.glyph_key of the crop, cached backend only
+
+
+class SolveResult(TypedDict):
+    text: str
+    ok: bool  # False when the captcha could not be split into 4 characters
+    glyphs: list[GlyphScore]
+    timings: dict[str, float]  # seconds spent in each stage
+
+
+class Backend(Protocol):
+    name: str
+
+    def solve(self, image: np.ndarray, timings: dict[str, float]) -> list[GlyphScore]:
+        """Recognize an RGB captcha, recording stage timings into `timings`."""
+        ...
+
+
+class _Timer:
+    def __init__(self, timings: dict[str, float], stage: str):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.timings[self.stage] = self.timings.get(self.stage, 0.0) + (
+            perf_counter() - self.start
+        )
+
+
+def segment_image(
+    image: np.ndarray,
+    threshold: int | Literal["auto"] | Sequence[int],
+    timings: dict[str, float],
+    repair: bool = False,
+) -> list[np.ndarray]:
+    """
+    binarize -> label -> segment_characters, timing each stage.
+    A sequence of thresholds uses `segment.segment_sweep` instead.
+    """
+    if not isinstance(threshold, (int, str)):
+        with _Timer(timings, "segment"):
+            chars, _ = segment.segment_sweep(image, threshold, repair=repair)
+        return chars
+
+    with _Timer(timings, "binarize"):
+        img_bin = utils.binarize_image(image, threshold)
+    with _Timer(timings, "label"):
+        labels_im, num_labels = segment.label(img_bin, background=255)
+    with _Timer(timings, "segment"):
+        chars = segment.segment_characters(labels_im, num_labels, repair=repair)
+    return chars
+
+
+Scores = np.ndarray | tuple[np.ndarray, np.ndarray]
+
+
+class TemplateBackend:
+    """
+    Segment the captcha and compare every character with the templates.
+    `score` maps crops to an (N, 35) score matrix, or to the matrix and the
+    (N, 35, 2) offsets of a shift-tolerant match; `largest` tells whether
+    higher scores are better. `pixels` converts scores to the number of
+    differing pixels, so margins can be compared across metrics; it is
+    None when the metric has no such conversion (cossim).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        key: str,
+        score: Callable[[list[np.ndarray]], Scores],
+        largest: bool = False,
+        threshold: int | Literal["auto"] | Sequence[int] = utils.THRESHOLD,
+        repair: bool = False,
+        pixels: Callable[[np.ndarray], np.ndarray] | None = None,
+    ):
+        self.name = name
+        self.key = key
+        self.score = score
+        self.largest = largest
+        self.threshold = threshold
+        self.repair = repair
+        self.pixels = pixels
+
+    def segment(self, image: np.ndarray, timings: dict[str, float]) -> list[np.ndarray]:
+        return segment_image(image, self.threshold, timings, self.repair)
+
+    def match(self, chars: list[np.ndarray], timings: dict[str, float]) -> Scores:
+        with _Timer(timings, "match"):
+            return self.score(chars)
+
+    def scores(self, image: np.ndarray, timings: dict[str, float]) -> Scores | None:
+        """Score matrix of the segmented characters, None if segmentation failed."""
+        chars = self.segment(image, timings)
+        if len(chars) != DIGITS_COUNT:
+            return None
+        return self.match(chars, timings)
+
+    def glyphs(self, scores: Scores) -> list[GlyphScore]:
+        """Best template of every row, with its margin to the second-best one."""
+        offsets = None
+        if isinstance(scores, tuple):
+            scores, offsets = scores
+        ordered = -scores if self.largest else scores
+        order = np.argsort(ordered, axis=-1, kind="stable")[:, :2]
+        best, second = np.take_along_axis(ordered, order, axis=-1).T
+        glyphs: list[GlyphScore] = [
+            {"char": self.key[i], "score": float(row[i]), "margin": float(m)}
+            for i, row, m in zip(order[:, 0], scores, second - best)
+        ]
+        if offsets is not None:
+            for glyph, i, row in zip(glyphs, order[:, 0], offsets):
+                glyph["offset"] = (int(row[i, 0]), int(row[i, 1]))
+        return glyphs
+
+    def pixel_margins(self, scores: Scores) -> np.ndarray:
+        """Differing pixels between the best and second-best template of every row."""
+        if self.pixels is None:
+            raise ValueError(f"{self.name} scores cannot be converted to pixels")
+        if isinstance(scores, tuple):
+            scores, _ = scores
+        counts = np.sort(self.pixels(scores), axis=-1)[:, :2]
+        return counts[:, 1] - counts[:, 0]
+
+    def solve(self, image: np.ndarray, timings: dict[str, float]) -> list[GlyphScore]:
+        scores = self.scores(image, timings)
+        if scores is None:
+            return []
+        return self.glyphs(scores)
+
+
+class ModelBackend:
+    """Run a `tflite.CaptchaModel` (or a compatible model) on the whole captcha."""
+
+    def __init__(self, name: str, model):
+        self.name = name
+        self.model = model
+
+    def solve(self, image: np.ndarray, timings: dict[str, float]) -> list[GlyphScore]:
+        with _Timer(timings, "preprocess"):
+            digits = self.model.split_digits(image[np.newaxis])
+        with _Timer(timings, "inference"):
+            probabilities = self.model.predict(digits)
+        indices = probabilities.argmax(axis=-1)
+        return [
+            {"char": tflite.labels[i], "score": float(row[i])}
+            for i, row in zip(indices, probabilities)
+        ]
+
+
+# margin 以「最佳與次佳模板相差的像素數」計算，與距離的尺度無關。
+# 以 test/cascade/test_cascade_margin.py 在本地 60 張已知答案的驗證碼上校正：
+# 正確字元的 margin 最小為 3、第 1 百分位為 15（O 與 Q 都是 15，只差 Q 的尾巴），
+# 唯一辨識錯誤的字元（9 認成 5）只差 2 像素。預設 5 像素只送出 2 / 240 個字元給 TFLite；
+# 容易混淆的字元（見 fixQ.py, fixF.py, fix7.py）用 10，仍低於 O/Q 的 15，不會把所有 O/Q 都送出。
+MIN_MARGIN = 5.0
+DEFAULT_MARGINS = {char: 10.0 for char in "OQFP7T"}
+
+
+class CascadeBackend:
+    """
+    Use the cheap template backend when it is sure and TFLite when it is not.
+
+    A glyph is uncertain when its best and second-best templates differ by
+    fewer than `margins[char]` pixels (default `min_margin`). Counting pixels
+    keeps the thresholds meaningful for any primary that can convert its
+    scores (eucdist, hamming); others are rejected. Uncertain glyphs take
+    the TFLite answer at the same position, and captchas that do not split
+    into 4 characters are solved by TFLite entirely. `stats` counts how
+    often each path is taken.
+
+    The defaults (`MIN_MARGIN`, `DEFAULT_MARGINS`) were tuned on the 60
+    labelled captchas under test/; recalibrate them on your own data with
+    test/cascade/test_cascade_margin.py.
+    """
+
+    name = "cascade"
+
+    def __init__(
+        self,
+        primary: TemplateBackend | None = None,
+        fallback: ModelBackend | None = None,
+        min_margin: float = MIN_MARGIN,
+        margins: dict[str, float] | None = None,
+    ):
+        self.primary = primary or _eucdist()
+        if self.primary.pixels is None:
+            raise ValueError(
+                f"CascadeBackend needs a primary with pixel margins (eucdist, hamming). "
+                f"Got {self.primary.name}"
+            )
+        self.fallback = fallback or _tflite()
+        self.min_margin = min_margin
+        self.margins = DEFAULT_MARGINS if margins is None else margins
+        self.stats: Counter[str] = Counter()
+
+    def is_certain(self, char: str, margin: float) -> bool:
+        """Whether a glyph read as `char`, `margin` pixels from the runner-up, is trusted."""
+        return margin >= self.margins.get(char, self.min_margin)
+
+    def solve(self, image: np.ndarray, timings: dict[str, float]) -> list[GlyphScore]:
+        self.stats["captchas"] += 1
+
+        scores = self.primary.scores(image, timings)
+        if scores is None:
+            self.stats["fallback_segment"] += 1
+            glyphs = self.fallback.solve(image, timings)
+            return [{**glyph, "source": self.fallback.name} for glyph in glyphs]
+
+        glyphs = self.primary.glyphs(scores)
+        margins = self.primary.pixel_margins(scores)
+        uncertain = [
+            i
+            for i, (glyph, margin) in enumerate(zip(glyphs, margins))
+            if not self.is_certain(glyph["char"], margin)
+        ]
+        self.stats["glyphs"] += len(glyphs)
+        self.stats["fallback_glyphs"] += len(uncertain)
+
+        if not uncertain:
+            self.stats["template"] += 1
+            return [{**glyph, "source": self.primary.name} for glyph in glyphs]
+
+        self.stats["fallback_margin"] += 1
+        fallback_glyphs = self.fallback.solve(image, timings)
+        return [
+            {**fallback_glyphs[i], "source": self.fallback.name}
+            if i in uncertain
+            else {**glyph, "source": self.primary.name}
+            for i, glyph in enumerate(glyphs)
+        ]
+
+
+class CachedBackend:
+    """
+    Look every crop up in a `GlyphCache` before matching it with the templates.
+
+    Hits skip the distance computation; only the missing crops are scored by
+    `primary`. Every glyph carries its cache `key`, so a result accepted by
+    the server can be fed back with `cache.confirm(result)`.
+    """
+
+    name = "cached"
+
+    def __init__(
+        self, primary: TemplateBackend | None = None, cache: GlyphCache | None = None
+    ):
+        self.primary = primary or _eucdist()
+        self.cache = GlyphCache() if cache is None else cache
+
+    def solve(self, image: np.ndarray, timings: dict[str, float]) -> list[GlyphScore]:
+        chars = self.primary.segment(image, timings)
+        if len(chars) != DIGITS_COUNT:
+            return []
+
+        with _Timer(timings, "cache"):
+            keys = [glyph_key(char) for char in chars]
+            hits = [self.cache.get(key) for key in keys]
+
+        misses = [i for i, char in enumerate(hits) if char is None]
+        matched = iter(
+            self.primary.glyphs(self.primary.match([chars[i] for i in misses], timings))
+            if misses
+            else []
+        )
+        # a confirmed glyph is a perfect match: distance 0 or similarity 1
+        perfect = 1.0 if self.primary.largest else 0.0
+        return [
+            {**next(matched), "key": key, "source": self.primary.name}
+            if char is None
+            else {"char": char, "score": perfect, "key": key, "source": "cache"}
+            for char, key in zip(hits, keys)
+        ]
+
+
+def _eucdist(
+    threshold: int | Literal["auto"] | Sequence[int] = utils.THRESHOLD,
+    repair: bool = False,
+    max_shift: int = 0,
+) -> Backend:
+    import eucdist
+
+    eucdist.get_templates()
+    score = eucdist.get_distances
+    if max_shift:
+        score = partial(eucdist.get_shifted_distances, max_shift=max_shift)
+    return TemplateBackend(
+        "eucdist",
+        eucdist.key,
+        score,
+        threshold=threshold,
+        repair=repair,
+        # 二值化後每個不同的像素貢獻 255²
+        pixels=lambda distances: np.rint(np.square(distances / 255.0)),
+    )
+
+
+def _cossim(
+    threshold: int | Literal["auto"] | Sequence[int] = utils.THRESHOLD, repair: bool = False
+) -> Backend:
+    import cossim
+
+    cossim.get_templates()
+    return TemplateBackend(
+        "cossim",
+        cossim.key,
+        cossim.get_similarities,
+        largest=True,
+        threshold=threshold,
+        repair=repair,
+    )
+
+
+def _hamming(
+    threshold: int | Literal["auto"] | Sequence[int] = utils.THRESHOLD, repair: bool = False
+) -> Backend:
+    import hamming
+
+    hamming.get_packed_table()
+    return TemplateBackend(
+        "hamming",
+        hamming.key,
+        hamming.get_distances,
+        threshold=threshold,
+        repair=repair,
+        pixels=lambda distances: distances,
+    )
+
+
+def _tflite() -> Backend:
+    model = tflite.CaptchaModel()
+    model.warmup()
+    return ModelBackend("tflite", model)
+
+
+def _tflite_numpy() -> Backend:
+    import tflite_numpy
+
+    return ModelBackend("tflite_numpy", tflite_numpy.NumpyCaptchaModel())
+
+
+BACKENDS: dict[str, Callable[[], Backend]] = {
+    "eucdist": _eucdist,
+    "cossim": _cossim,
+    "hamming": _hamming,
+    "tflite": _tflite,
+    "tflite_numpy": _tflite_numpy,
+    "cascade": CascadeBackend,
+    "cached": CachedBackend,
+}
+
+
+class CaptchaSolver:
+    """
+    Solve captchas with a pluggable backend, loaded once when the solver is created.
+
+    >>> solver = CaptchaSolver("eucdist")
+    >>> solver.solve(image)["text"]
+    """
+
+    def __init__(self, backend: str | Backend = "eucdist", **options):
+        """
+        `options` are passed to the backend factory, e.g.
+        `CaptchaSolver("eucdist", threshold=segment.SWEEP_THRESHOLDS)`.
+        """
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError(
+                    f"Unknown backend {backend!r}, choose from {', '.join(BACKENDS)}"
+                )
+            backend = BACKENDS[backend](**options)
+        self.backend = backend
+
+    def solve(self, image: np.ndarray) -> SolveResult:
+        timings: dict[str, float] = {}
+        start = perf_counter()
+        glyphs = self.backend.solve(np.asarray(image), timings)
+        timings["total"] = perf_counter() - start
+
+        return {
+            "text": "".join(glyph["char"] for glyph in glyphs),
+            "ok": len(glyphs) == DIGITS_COUNT,
+            "glyphs": glyphs,
+            "timings": timings,
+        }
+
+    def solve_many(self, images: Iterable[np.ndarray]) -> Iterator[SolveResult]:
+        """Lazily solve captchas one by one, e.g. while they are being downloaded."""
+        for image in images:
+            yield self.solve(image)
@@ -0,0 +1,179 @@
+"""
+把 assets/*.bmp 編譯成單一的模板檔，讓比對器以 memory map 延遲載入。
+除了 uint8 的模板，也存一份比對時直接使用的 int64 模板，
+多個行程（fork 或 spawn）比對時共用同一份分頁，不必各自轉型複製。
+
+BMP 被 character_gen.py、fix*.py 重新產生或手動修改後，模板檔會在下次載入時自動重新編譯。
+
+檔案格式（little-endian）：
+    magic (8 bytes) | version (u16) | count (u16) | height (u16) | width (u16)
+    | sha256 of both glyph blocks (32 bytes) | sha256 of the source BMPs (32 bytes)
+    | key (count bytes) | 0 padding to 64 bytes
+    | glyphs (count * height * width uint8) | 0 padding to 64 bytes
+    | wide glyphs (count * height * width int64)
+
+使用方式：
+    python template_bank.py
+"""
+
+from __future__ import annotations
+import hashlib
+import io
+import os
+import struct
+from functools import cache
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+KEY = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+VERSION = 3
+MAGIC = b"WEBAPTPL"
+
+ASSET_DIR = Path(__file__).resolve().parent / "assets"
+BANK_PATH = ASSET_DIR / "templates.bank"
+
+_HEADER = struct.Struct("<8sHHHH32s32s")
+_ALIGNMENT = 64
+
+
+class TemplateBank(NamedTuple):
+    key: str
+    glyphs: np.ndarray  # (count, height, width) uint8, read-only memmap
+    wide: np.ndarray  # the same glyphs as int64, read-only memmap used by TemplateMatcher
+    version: int
+
+
+def _align(size: int) -> int:
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _payload_offset(count: int) -> int:
+    return _align(_HEADER.size + count)
+
+
+def _bank_size(count: int, height: int, width: int) -> int:
+    size = count * height * width
+    return _payload_offset(count) + _align(size) + 8 * size
+
+
+def _read_sources(asset_dir: Path, key: str) -> list[bytes]:
+    return [(asset_dir / f"{k}.bmp").read_bytes() for k in key]
+
+
+def _sources_digest(sources: list[bytes]) -> bytes:
+    digest = hashlib.sha256()
+    for source in sources:
+        digest.update(len(source).to_bytes(8, "little"))
+        digest.update(source)
+    return digest.digest()
+
+
+def build(
+    asset_dir: Path = ASSET_DIR, path: Path = BANK_PATH, key: str = KEY
+) -> Path:
+    """Compile `asset_dir/{k}.bmp` for every k in `key` into `path`."""
+    from PIL import Image
+
+    sources = _read_sources(asset_dir, key)
+    glyphs = np.stack(
+        [np.array(Image.open(io.BytesIO(source)), dtype=np.uint8) for source in sources]
+    )
+    if glyphs.ndim != 3:
+        raise ValueError(f"Templates must be grayscale images. Got {glyphs.shape}")
+
+    count, height, width = glyphs.shape
+    narrow = np.ascontiguousarray(glyphs).tobytes()
+    payload = narrow.ljust(_align(len(narrow)), b"\0") + glyphs.astype("<i8").tobytes()
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        count,
+        height,
+        width,
+        hashlib.sha256(payload).digest(),
+        _sources_digest(sources),
+    ) + key.encode("ascii")
+    header = header.ljust(_payload_offset(count), b"\0")
+
+    # 先寫入暫存檔再替換，避免其他行程讀到寫到一半的檔案
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    tmp.write_bytes(header + payload)
+    os.replace(tmp, path)
+    return path
+
+
+def _read_header(path: Path) -> tuple[bytes, int, int, int, int, bytes, bytes, str]:
+    with open(path, "rb") as f:
+        data = f.read(_HEADER.size)
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        *header, count, height, width, digest, sources = _HEADER.unpack(data)
+        key = f.read(count).decode("ascii")
+    return (*header, count, height, width, digest, sources, key)
+
+
+def open_bank(path: Path = BANK_PATH) -> TemplateBank:
+    """Memory-map a compiled template bank and verify its header and checksum."""
+    magic, version, count, height, width, digest, _, key = _read_header(path)
+
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a template bank")
+    if version != VERSION:
+        raise ValueError(f"Unsupported template bank version {version} in {path}")
+
+    offset = _payload_offset(count)
+    size = count * height * width
+    if path.stat().st_size != _bank_size(count, height, width):
+        raise ValueError(f"{path} is truncated, rebuild it with template_bank.py")
+    payload = np.memmap(path, dtype=np.uint8, mode="r", offset=offset)
+    if hashlib.sha256(payload).digest() != digest:
+        raise ValueError(f"Checksum mismatch in {path}, rebuild it with template_bank.py")
+
+    shape = (count, height, width)
+    glyphs = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=shape)
+    wide = np.memmap(path, dtype="<i8", mode="r", offset=offset + _align(size), shape=shape)
+    return TemplateBank(key, glyphs, wide, version)
+
+
+def is_current(path: Path = BANK_PATH, asset_dir: Path = ASSET_DIR, key: str = KEY) -> bool:
+    """
+    Whether `path` is a complete bank of this version compiled from the
+    current BMPs. Without the BMPs (e.g. only the bank was shipped) any
+    complete bank of this version counts as current.
+    """
+    try:
+        magic, version, count, height, width, _, sources, bank_key = _read_header(path)
+        size = path.stat().st_size
+    except (OSError, ValueError):
+        return False
+    if magic != MAGIC or version != VERSION or bank_key != key:
+        return False
+    if size != _bank_size(count, height, width):
+        return False
+    try:
+        return sources == _sources_digest(_read_sources(asset_dir, key))
+    except OSError:
+        return True
+
+
+@cache
+def load() -> TemplateBank:
+    """
+    The default bank, opened on first use and shared afterwards.
+    It is compiled from the BMP assets if it does not exist yet, is
+    corrupted, was written by another version or the BMPs changed since.
+    """
+    if not is_current():
+        build()
+    try:
+        return open_bank()
+    except ValueError:
+        # 標頭完整但內容損毀
+        build()
+        return open_bank()
+
+
+if __name__ == "__main__":
+    print(f"Template bank written to {build()}")
@@ -0,0 +1,70 @@
+import glob
+from pathlib import Path
+
+from PIL import Image
+import numpy as np
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from solver import DEFAULT_MARGINS, CaptchaSolver, CascadeBackend, _cossim, _eucdist
+
+# 預設使用 test/ 中已知答案的驗證碼；也可以傳入其他資料的 glob，例如 "data/*.bmp"（檔名為答案）
+patterns = sys.argv[1:] or ["test/eucdist/success/*.bmp", "test/tflite/success/*.bmp"]
+
+# 兩個資料夾有重複的驗證碼，以像素內容去除重複
+images: dict[bytes, tuple[np.ndarray, str]] = {}
+paths = [path for pattern in patterns for path in glob.glob(pattern)]
+for path in sorted(paths):
+    image = np.array(Image.open(path))
+    images.setdefault(image.tobytes(), (image, Path(path).stem))
+
+# eucdist 每個字元的像素 margin 與是否正確
+primary = _eucdist()
+margins: list[tuple[float, bool, str]] = []
+for image, answer in images.values():
+    scores = primary.scores(image, {})
+    if scores is None:
+        continue
+    for glyph, margin, char in zip(primary.glyphs(scores), primary.pixel_margins(scores), answer):
+        # 門檻依辨識出的字元決定
+        margins.append((float(margin), glyph["char"] == char, glyph["char"]))
+
+correct = np.array([m for m, ok, _ in margins if ok])
+wrong = sorted(m for m, ok, _ in margins if not ok)
+print(f"{len(images)} captchas, {len(margins)} glyphs, {len(wrong)} wrong")
+if correct.size:
+    percentiles = np.percentile(correct, [0, 1, 5, 25, 50])
+    print(
+        "Correct glyphs (px): "
+        + ", ".join(f"p{p} {v:.0f}" for p, v in zip((0, 1, 5, 25, 50), percentiles))
+    )
+print(f"Wrong glyphs (px): {wrong}")
+
+print("min_margin  confusable  fallback glyphs  wrong caught")
+for min_margin in (3, 5, 8, 12):
+    for confusable in (min_margin, 2 * min_margin):
+        threshold = lambda c: confusable if c in DEFAULT_MARGINS else min_margin
+        sent = [(m, ok) for m, ok, c in margins if m < threshold(c)]
+        print(
+            f"{min_margin:10d}  {confusable:10d}  {len(sent):6d} / {len(margins)}"
+            f"  {sum(not ok for _, ok in sent):5d} / {len(wrong)}"
+        )
+
+# 預設門檻的校正報告：錯誤卻被視為確定的字元不會交給 TFLite，數量越少越好。
+# 預設值是以 test/ 中的驗證碼校正的，其他資料可能需要不同的門檻，所以這裡只報告不檢查。
+solver = CaptchaSolver(CascadeBackend())
+results = [(solver.solve(image), answer) for image, answer in images.values()]
+accuracy = sum(result["text"] == answer for result, answer in results)
+print(f"Cascade: {accuracy} / {len(results)} correct, {dict(solver.backend.stats)}")
+certain_wrong = [(c, m) for m, ok, c in margins if not ok and solver.backend.is_certain(c, m)]
+print(f"Wrong but certain with the default margins: {len(certain_wrong)} / {len(wrong)} {certain_wrong}")
+
+# cossim 的分數沒有像素單位，不能當 primary
+try:
+    CascadeBackend(primary=_cossim())
+except ValueError as e:
+    print(f"cossim primary rejected: {e}")
+else:
+    raise AssertionError("cossim primary should be rejected")
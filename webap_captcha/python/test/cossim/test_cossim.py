@@ -7,9 +7,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-import utils
-import segment
-import cossim
+from solver import CaptchaSolver
 
 paths = glob.glob("test/tflite/success/*.bmp")
 
@@ -17,23 +15,16 @@ seg_err_cnt = 0
 compare_err_cnt = 0
 cnt = 0
 
-for path in paths:
-    ans = path.split("/")[-1].split(".")[0]
-
-    image = Image.open(path)
-    img = np.array(image)
+solver = CaptchaSolver("cossim")
+images = (np.array(Image.open(path)) for path in paths)
 
-    img_bin = utils.binarize_image(img, 138)
-    labels_im, num_labels = segment.label(img_bin, background=255)
-    chars = segment.segment_characters(labels_im, num_labels)
+for path, solved in zip(paths, solver.solve_many(images)):
+    ans = path.split("/")[-1].split(".")[0]
 
-    if len(chars) != 4:
+    if not solved["ok"]:
         seg_err_cnt += 1
     else:
-        result = ''
-        for char in chars:
-            character = cossim.get_character(char)
-            result += character
+        result = solved["text"]
     
         if result != ans:
             # print(f"Expected: {ans}, Got: {result}")
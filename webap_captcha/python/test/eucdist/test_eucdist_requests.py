@@ -1,55 +1,56 @@
-import numpy as np
-from io import BytesIO
-from PIL import Image
-
 from random import random
+from time import sleep
 import requests
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[4] / "webap_helper" / "python"))
 
+import bmp
 import eucdist
-import utils
 import segment
+from deadline import Deadline
+from errors import CircuitOpenError, WebApError
+from image_sink import ImageSink
+from transport import Transport
 
 URL = "https://webap0.nkust.edu.tw/nkust/"
+DEADLINE = 30.0  # 每次登入的時間上限（秒）
 
 seg_err_cnt = 0
 
 def login(
-    session: requests.Session, url: str, username: str, password: str
+    session: requests.Session, url: str, username: str, password: str, sink: ImageSink
 ) -> bool:
     global seg_err_cnt
     result = True
 
-    response = session.get(url + "index.html", verify="nkust.pem")
+    # 三個請求依比例分配同一個期限，伺服器很慢時不會一直卡住，逾時拋出 DeadlineExceededError
+    deadline = Deadline(DEADLINE)
+
+    response = session.get(url + "index.html", deadline=deadline, step="index")
     text = response.text
 
     # Captcha
     response_validate = session.get(
-        url=url + f"validateCode.jsp?it={random()}",
-        headers={
-            "User-Agent": "Mozilla/5.0",
-            "Referer": "https://webap0.nkust.edu.tw/nkust/",
-        },
-        verify="nkust.pem"
+        url=url + f"validateCode.jsp?it={random()}", deadline=deadline, step="captcha"
     )
 
     if response_validate.status_code != 200:
         raise ConnectionError("Failed to get captcha image")
 
-    img = Image.open(BytesIO(response_validate.content))
+    data = response_validate.content
+    img = bmp.decode(data)
     
-    img_bin = utils.binarize_image(np.array(img), 138)
-    labels_im, num_labels = segment.label(img_bin, background=255)
-    chars = segment.segment_characters(labels_im, num_labels)
+    # 138 分割失敗時改試其他門檻，比重新登入一次便宜
+    chars, _ = segment.segment_sweep(img)
 
     captcha_answer = ''
 
     if len(chars) != 4:
         seg_err_cnt += 1
-        img.save(f"test/segment/failed/unknown/{seg_err_cnt}.bmp")
+        sink.put(f"test/segment/failed/unknown/{seg_err_cnt}.bmp", data)
         result = False
     else:
         for char in chars:
@@ -58,19 +59,17 @@ def login(
 
     payload = {"uid": username, "pwd": password, "etxt_code": captcha_answer}
 
-    response = session.post(url + "perchk.jsp", data=payload, verify="nkust.pem")
+    response = session.post(url + "perchk.jsp", data=payload, deadline=deadline, step="login")
     text = response.text
 
     # print(text)
     
     if "驗證碼錯誤" in text:
-        try:
-            img.save(f"test/eucdist/failed/{captcha_answer}.bmp")
-        except ValueError:
-            pass
+        if captcha_answer:
+            sink.put(f"test/eucdist/failed/{captcha_answer}.bmp", data)
         result = False
     else:
-        img.save(f"test/eucdist/success/{captcha_answer}.bmp")
+        sink.put(f"test/eucdist/success/{captcha_answer}.bmp", data)
 
     return result
 
@@ -88,13 +87,25 @@ if __name__ == "__main__":
    
     total = 5000
     err_count = 0
-    for i in range(total):
-        session = requests.Session()
-        result = login(session, URL, username, password)
-        session.close()
-        err_count += 0 if result else 1
-        print(f"\r{i+1} / {total}", end="")
-
+    # 圖片交給背景執行緒寫入，磁碟延遲不會拖慢登入迴圈
+    # 每次登入有獨立的 cookie，但共用同一個 keep-alive 連線池
+    with ImageSink() as sink, Transport(URL) as transport:
+        for i in range(total):
+            try:
+                with transport.session() as session:
+                    result = login(session, URL, username, password, sink)
+            except CircuitOpenError as e:
+                # 校務系統連續失敗，等到斷路器允許探測再繼續
+                print(f"\n{e}")
+                sleep(e.retry_after)
+                result = False
+            except (requests.RequestException, WebApError) as e:
+                print(f"\n{e}")
+                result = False
+            err_count += 0 if result else 1
+            print(f"\r{i+1} / {total}", end="")
+
+    print(f"\nImages: {sink.stats}")
     print(f"Segmentation errors: {seg_err_cnt} / {total}")
     print(f"Error: {err_count} / {total}")
     print(f"Accuracy: {(total - err_count) / total * 100:.2f}%")
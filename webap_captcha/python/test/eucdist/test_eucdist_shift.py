@@ -0,0 +1,53 @@
+import glob
+from collections import Counter
+from time import perf_counter
+
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import eucdist
+from solver import CaptchaSolver
+
+paths = glob.glob("test/eucdist/success/*.bmp")
+images = [np.array(Image.open(path)) for path in paths]
+answers = [path.split("/")[-1].split(".")[0] for path in paths]
+
+# 與逐一平移的結果比對
+matcher = eucdist.get_templates()
+glyphs = np.random.default_rng(0).integers(0, 2, (64, 22, 22), dtype=np.uint8) * 255
+distances, offsets = matcher.shifted_squared_distances(glyphs, max_shift=2)
+templates = matcher.matrix.reshape(-1, 22, 22)
+for glyph, row, row_offsets in zip(glyphs, distances, offsets):
+    padded = np.pad(glyph.astype(np.int64), 2)
+    for template, d, (dy, dx) in zip(templates, row, row_offsets):
+        brute = min(
+            ((padded[a : a + 22, b : b + 22] - template) ** 2).sum()
+            for a in range(5)
+            for b in range(5)
+        )
+        moved = padded[2 - dy : 24 - dy, 2 - dx : 24 - dx]
+        assert d == brute == ((moved - template) ** 2).sum()
+assert np.array_equal(
+    matcher.shifted_squared_distances(glyphs, max_shift=0)[0], matcher.squared_distances(glyphs)
+)
+print("Shifted distances match the brute-force search")
+
+for max_shift in (0, 1, 2):
+    solver = CaptchaSolver("eucdist", max_shift=max_shift)
+    start = perf_counter()
+    results = list(solver.solve_many(images))
+    elapsed = perf_counter() - start
+
+    correct = sum(r["text"] == ans for r, ans in zip(results, answers))
+    moved = Counter(
+        glyph.get("offset", (0, 0)) for r in results for glyph in r["glyphs"]
+    )
+    print(
+        f"max_shift={max_shift}: {correct} / {len(paths)} correct, "
+        f"{elapsed / len(paths) * 1e3:.2f} ms / captcha, offsets {dict(moved)}"
+    )
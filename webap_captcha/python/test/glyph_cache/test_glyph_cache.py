@@ -0,0 +1,53 @@
+import glob
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from PIL import Image
+import numpy as np
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from glyph_cache import GlyphCache
+from solver import CaptchaSolver
+
+paths = glob.glob("test/eucdist/success/*.bmp")
+images = [np.array(Image.open(path)) for path in paths]
+answers = [path.split("/")[-1].split(".")[0] for path in paths]
+
+cache = GlyphCache()
+solver = CaptchaSolver("cached", cache=cache)
+
+
+def run(label: str) -> None:
+    hits, misses = cache.stats["hits"], cache.stats["misses"]
+    start = perf_counter()
+    results = list(solver.solve_many(images))
+    elapsed = perf_counter() - start
+    match = sum(r["timings"].get("match", 0.0) for r in results)
+
+    correct = 0
+    for result, ans in zip(results, answers):
+        # 以檔名模擬 perchk.jsp 的登入結果
+        if result["text"] == ans:
+            correct += 1
+            cache.confirm(result)
+
+    hits, misses = cache.stats["hits"] - hits, cache.stats["misses"] - misses
+    print(
+        f"{label}: {correct} / {len(paths)} correct, hit rate {hits / (hits + misses) * 100:.1f}%, "
+        f"{elapsed / len(paths) * 1e3:.2f} ms / captcha ({match / len(paths) * 1e3:.2f} ms matching)"
+    )
+
+
+run("First pass")
+run("Second pass")
+print(f"Cache: {len(cache)} glyphs, {cache.stats}")
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = cache.save(Path(tmp) / "glyph_cache.json")
+    loaded = GlyphCache(path=path)
+    assert list(loaded._entries.items()) == list(cache._entries.items())
+    print(f"Saved and reloaded {len(loaded)} glyphs ({path.stat().st_size} bytes)")
@@ -0,0 +1,57 @@
+"""
+比較 hamming 與 eucdist 的結果是否一致，以及兩者的比對吞吐量。
+"""
+
+import glob
+from timeit import timeit
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import utils
+import segment
+import eucdist
+import hamming
+from matcher import to_canvas
+
+paths = glob.glob("test/eucdist/success/*.bmp") + glob.glob("test/tflite/success/*.bmp")
+
+glyphs: list[np.ndarray] = []
+for path in paths:
+    img_bin = utils.binarize_image(np.array(Image.open(path)), 138)
+    labels_im, num_labels = segment.label(img_bin, background=255)
+    glyphs += segment.segment_characters(labels_im, num_labels)
+
+if not glyphs:
+    raise SystemExit("No glyph found under test/*/success/")
+
+mismatch = sum(
+    1 for glyph in glyphs if eucdist.get_character(glyph) != hamming.get_character(glyph)
+)
+print(f"Mismatches: {mismatch} / {len(glyphs)}")
+
+canvas = to_canvas(glyphs)
+packed = hamming.pack(canvas)
+comparisons = len(glyphs) * len(hamming.key)
+number = 20
+
+benchmarks = {
+    "eucdist (per glyph)": lambda: [eucdist.get_character(g) for g in glyphs],
+    "eucdist (batch)": lambda: eucdist.get_characters(canvas),
+    "hamming (per glyph)": lambda: [hamming.get_character(g) for g in glyphs],
+    "hamming (batch)": lambda: hamming.get_characters(canvas),
+    "hamming (pre-packed)": lambda: np.bitwise_count(
+        packed[:, np.newaxis, :] ^ hamming.get_packed_table()
+    ).sum(axis=-1),
+}
+
+for name, func in benchmarks.items():
+    t = timeit(func, number=number) / number
+    print(
+        f"{name:>22}: {len(glyphs) / t:>12,.0f} glyphs/s, "
+        f"{t / comparisons * 1e9:8.2f} ns / comparison"
+    )
@@ -0,0 +1,104 @@
+import glob
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+from time import perf_counter, sleep
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from image_sink import ImageSink
+
+# 以本地的驗證碼模擬 5000 次登入，每次都要存一張圖
+paths = glob.glob("test/eucdist/success/*.bmp")
+images = [Path(path).read_bytes() for path in paths]
+total = 5000
+
+
+def run_sync(directory: Path) -> float:
+    start = perf_counter()
+    for i in range(total):
+        with open(directory / f"{i}.bmp", "wb") as f:
+            f.write(images[i % len(images)])
+    return perf_counter() - start
+
+
+def run_sink(
+    directory: Path, count: int = total, pace: float = 0.0, **options
+) -> tuple[float, float, ImageSink]:
+    start = perf_counter()
+    with ImageSink(**options) as sink:
+        for i in range(count):
+            sink.put(directory / f"{i}.bmp", images[i % len(images)])
+            if pace:
+                sleep(pace)  # 模擬登入本身的時間
+        loop = perf_counter() - start
+    return loop, perf_counter() - start, sink
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    tmp = Path(tmp)
+    for name in ("sync", "files", "archive", "sampled", "roomy", "errors"):
+        (tmp / name).mkdir()
+
+    elapsed = run_sync(tmp / "sync")
+    print(f"Synchronous writes:  {elapsed / total * 1e6:.1f} us / login in the loop")
+
+    loop, elapsed, sink = run_sink(tmp / "files", max_queue=total)
+    assert sink.stats["written"] == total == len(list((tmp / "files").iterdir()))
+    print(
+        f"ImageSink (files):   {loop / total * 1e6:.1f} us / login in the loop, "
+        f"{elapsed:.2f} s until flushed, {sink.stats}"
+    )
+
+    loop, elapsed, sink = run_sink(
+        Path("captchas"), max_queue=total, archive=tmp / "archive" / "captchas.zip"
+    )
+    with zipfile.ZipFile(tmp / "archive" / "captchas.zip") as archive:
+        assert len(archive.namelist()) == total
+    print(
+        f"ImageSink (archive): {loop / total * 1e6:.1f} us / login in the loop, "
+        f"{elapsed:.2f} s until flushed, {sink.stats}"
+    )
+
+    # 寫入跟得上、佇列有空間時，sample_rate 不丟任何圖片
+    count = 1000
+    loop, elapsed, sink = run_sink(
+        tmp / "roomy", count, pace=0.001, max_queue=64, sample_rate=0.1, seed=0
+    )
+    assert sink.stats["written"] == count and sink.stats["sampled_out"] == 0
+    print(f"ImageSink (10%, 64, 1 ms / login): {elapsed:.2f} s until flushed, {sink.stats}")
+
+    # 佇列堆積到一半以上才開始取樣
+    loop, elapsed, sink = run_sink(tmp / "sampled", max_queue=64, sample_rate=0.1, seed=0)
+    assert sink.stats["queued"] + sink.stats["dropped"] + sink.stats["sampled_out"] == total
+    print(
+        f"ImageSink (10%, 64): {loop / total * 1e6:.1f} us / login in the loop, "
+        f"{elapsed:.2f} s until flushed, {sink.stats}"
+    )
+
+    # 寫入失敗（非 OSError）只計入 errors，寫入執行緒繼續執行
+    for archive in (None, tmp / "errors" / "captchas.zip"):
+        with ImageSink(archive=archive) as sink:
+            sink.put(tmp / "errors" / "none.bmp", None)  # TypeError
+            sink.put(tmp / "errors" / "nul\0.bmp", images[0])  # ValueError
+            for i in range(10):
+                sink.put(tmp / "errors" / f"{i}.bmp", images[i % len(images)])
+        assert sink.stats["errors"] == (2 if archive is None else 1), sink.stats
+        assert sink.stats["written"] == sink.stats["queued"] - sink.stats["errors"]
+        print(f"ImageSink (bad data, {'zip' if archive else 'files'}): {sink.stats}")
+
+    # 寫入執行緒意外結束、佇列已滿時，close 也不會卡住
+    sink = ImageSink(max_queue=4, archive=tmp / "errors" / "dead.zip")
+    sink._write = lambda batch: sys.exit()
+    sink.put(tmp / "errors" / "first.bmp", images[0])
+    sink._thread.join()
+    while sink.put(tmp / "errors" / "more.bmp", images[0]):
+        pass
+    closer = threading.Thread(target=sink.close)
+    closer.start()
+    closer.join(5)
+    assert not closer.is_alive(), "close() blocked on a dead writer thread"
+    print(f"ImageSink (dead writer): closed, {sink.stats}")
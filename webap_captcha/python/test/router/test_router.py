@@ -0,0 +1,71 @@
+import glob
+import random
+from pathlib import Path
+
+from PIL import Image
+import numpy as np
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from router import BackendRouter
+from solver import CaptchaSolver
+
+ROUND_TRIP = 0.3  # 模擬 index.html -> validateCode.jsp -> perchk.jsp 的時間（秒）
+
+
+def route(router: BackendRouter, outcomes: dict, round_trip: float, n: int = 2000) -> str:
+    """以假的登入結果回報 n 次，回傳最後最常被選到的 backend。"""
+    rng = random.Random(0)
+    chosen = []
+    for _ in range(n):
+        name = router.choose()
+        accuracy, latency = outcomes[name]
+        router.record_latency(name, latency)
+        router.report(name, rng.random() < accuracy, round_trip=round_trip)
+        chosen.append(name)
+    return max(set(chosen[-500:]), key=chosen[-500:].count)
+
+
+# 快但常錯 vs 慢但準：每個錯誤的驗證碼都要再付一次完整的登入往返
+outcomes = {"fast": (0.5, 0.001), "accurate": (0.95, 0.02)}
+router = BackendRouter({name: None for name in outcomes}, seed=0)
+best = route(router, outcomes, ROUND_TRIP)
+print(f"Round trip {ROUND_TRIP:.3f} s: {best}, overhead {router.overhead:.3f} s")
+assert best == "accurate"
+
+# 幾乎沒有往返成本時，每秒成功數由辨識速度決定
+router = BackendRouter({name: None for name in outcomes}, seed=0)
+best = route(router, outcomes, 0.0)
+print(f"Round trip 0.000 s: {best}, overhead {router.overhead:.3f} s")
+assert best == "fast"
+
+# 本地驗證碼：以檔名模擬 perchk.jsp 的結果，比較每秒成功登入數
+paths = glob.glob("test/eucdist/success/*.bmp")
+images = [np.array(Image.open(path)) for path in paths]
+answers = [path.split("/")[-1].split(".")[0] for path in paths]
+
+
+def simulate(router: BackendRouter, rounds: int = 3) -> tuple[int, float]:
+    ok, elapsed = 0, 0.0
+    for _ in range(rounds):
+        for image, answer in zip(images, answers):
+            name, result = router.solve(image)
+            success = result["text"] == answer
+            elapsed += router.stats[name]["latency"] + ROUND_TRIP
+            router.report(name, success, round_trip=ROUND_TRIP)
+            ok += success
+    return ok, elapsed
+
+
+names = ["eucdist", "cossim", "tflite"]
+solvers = {name: CaptchaSolver(name) for name in names}
+router = BackendRouter(solvers, seed=0)
+ok, elapsed = simulate(router)
+print(f"Router: {ok} / {3 * len(paths)} ok, {ok / elapsed:.2f} logins / s (simulated)")
+for name, stats in router.export().items():
+    print(
+        f"  {name:<8} {stats['solves']:4d} solves, success {stats['success_rate'] * 100:5.1f}%, "
+        f"{stats['latency'] * 1e3:6.2f} ms, {stats['expected_rate']:.2f} logins / s"
+    )
@@ -0,0 +1,54 @@
+"""
+比較 segment.label 的 2D 快速路徑與通用 ND 實作在 40x85 驗證碼上的速度，並確認輸出一致。
+"""
+
+import glob
+from timeit import timeit
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import utils
+import segment
+
+paths = glob.glob("test/*/success/*.bmp")[:100]
+images = [utils.binarize_image(np.array(Image.open(path)), 138) for path in paths]
+
+if not images:
+    raise SystemExit("No captcha found under test/*/success/")
+
+structures = {
+    "4-connectivity": None,
+    "8-connectivity": np.ones((3, 3), dtype=bool),
+}
+
+for name, structure in structures.items():
+    offsets = segment._compute_causal_neighbor_offsets(
+        segment._default_structure(2) if structure is None else structure
+    )
+
+    def generic():
+        return [
+            segment._label_nd(img != 255, offsets, np.dtype("int64")) for img in images
+        ]
+
+    def fast():
+        return [segment.label(img, structure, background=255) for img in images]
+
+    mismatch = sum(
+        1
+        for (l1, n1), (l2, n2) in zip(generic(), fast())
+        if n1 != n2 or not np.array_equal(l1, l2)
+    )
+
+    t_generic = timeit(generic, number=3) / 3 / len(images)
+    t_fast = timeit(fast, number=3) / 3 / len(images)
+
+    print(f"[{name}] mismatches: {mismatch} / {len(images)}")
+    print(f"[{name}] generic: {t_generic * 1e3:.3f} ms / captcha")
+    print(f"[{name}] 2D fast: {t_fast * 1e3:.3f} ms / captcha")
+    print(f"[{name}] speedup: {t_generic / t_fast:.1f}x")
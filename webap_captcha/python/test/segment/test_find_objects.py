@@ -0,0 +1,101 @@
+"""
+確認 segment.find_objects 與舊版逐一 label 呼叫 np.where 的結果一致：
+隨機的 label 影像（包含沒有任何像素的 label、貼齊影像邊界的 label、大於 num_labels 的值）
+以及實際驗證碼的分割結果，並比較兩者的速度。
+"""
+
+import glob
+from timeit import timeit
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import utils
+import segment
+
+
+def find_objects_loop(labels_img: np.ndarray, num_labels: int) -> dict[int, tuple[int, ...]]:
+    """舊版實作：每個 label 各掃描一次整張影像"""
+    objects = {}
+    for i in range(1, num_labels + 1):
+        ys, xs = np.where(labels_img == i)
+        if len(xs) == 0 or len(ys) == 0:
+            continue
+        objects[i] = (xs.min(), ys.min(), xs.max(), ys.max(), len(xs))
+    return objects
+
+
+def segment_characters_loop(labels_img: np.ndarray, num_labels: int) -> list[np.ndarray]:
+    """舊版的 segment_characters"""
+    bboxes = []
+    for i, (x_min, y_min, x_max, y_max, _) in find_objects_loop(labels_img, num_labels).items():
+        if x_max - x_min < 5 or y_max - y_min < 5:
+            continue
+        bboxes.append((x_min, y_min, x_max, y_max))
+    bboxes = sorted(bboxes, key=lambda b: b[0])
+    return [
+        np.where(labels_img[y_min : y_max + 1, x_min : x_max + 1] > 0, 255, 0).astype(np.uint8)
+        for x_min, y_min, x_max, y_max in bboxes
+    ]
+
+
+def check(labels_img: np.ndarray, num_labels: int) -> None:
+    table = segment.find_objects(labels_img, num_labels)
+    assert table.shape == (num_labels, 5)
+    expected = find_objects_loop(labels_img, num_labels)
+    for i in range(1, num_labels + 1):
+        if i in expected:
+            assert tuple(table[i - 1]) == expected[i], (i, table[i - 1], expected[i])
+        else:
+            assert table[i - 1, 4] == 0, (i, table[i - 1])
+
+    chars = segment.segment_characters(labels_img, num_labels)
+    old = segment_characters_loop(labels_img, num_labels)
+    assert len(chars) == len(old) and all(np.array_equal(a, b) for a, b in zip(chars, old))
+
+
+rng = np.random.default_rng(0)
+cases = 0
+for _ in range(500):
+    h, w = rng.integers(1, 60, size=2)
+    num_labels = int(rng.integers(0, 40))
+    # 值域比 num_labels 大：有些 label 沒有像素，也有超出 num_labels 的值
+    labels_img = rng.integers(0, num_labels + 5, size=(h, w)).astype(np.int32)
+    labels_img[rng.random((h, w)) < rng.random()] = 0
+    check(labels_img, num_labels)
+    cases += 1
+
+# 貼齊四個邊界與角落的 label、單一像素的 label、整張都是同一個 label
+for h, w in ((1, 1), (1, 85), (40, 1), (40, 85)):
+    labels_img = np.zeros((h, w), dtype=np.int32)
+    labels_img[0, :] = 1
+    labels_img[-1, :] = 2
+    labels_img[:, 0] = 3
+    labels_img[:, -1] = 4
+    labels_img[h // 2, w // 2] = 6  # label 5 沒有任何像素
+    check(labels_img, 6)
+    check(np.full((h, w), 1, dtype=np.int32), 1)
+    check(np.zeros((h, w), dtype=np.int32), 3)
+    cases += 3
+
+paths = glob.glob("test/*/success/*.bmp")[:100]
+labeled = [
+    segment.label(utils.binarize_image(np.array(Image.open(path)), 138), background=255)
+    for path in paths
+]
+for labels_img, num_labels in labeled:
+    check(labels_img, num_labels)
+    cases += 1
+
+print(f"find_objects matches the per-label loop on {cases} label images")
+
+if labeled:
+    loop = timeit(lambda: [find_objects_loop(*item) for item in labeled], number=10)
+    single = timeit(lambda: [segment.find_objects(*item) for item in labeled], number=10)
+    n = 10 * len(labeled)
+    print(f"per-label np.where: {loop / n * 1e6:7.1f} us / captcha")
+    print(f"find_objects:       {single / n * 1e6:7.1f} us / captcha")
@@ -0,0 +1,111 @@
+"""
+統計 segment_characters 的修復（repair=True）能救回多少分割失敗的圖片，以及救回後 eucdist 能正確辨識幾張：
+- test/segment/failed 中實際分割失敗的圖片
+- 由 test/eucdist/success 合成的失敗：字元上下斷開、兩個字元相連、字元旁邊有雜點
+"""
+
+import glob
+from time import perf_counter
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import utils
+import segment
+import eucdist
+
+
+def bboxes_of(img_bin: np.ndarray) -> list[tuple[int, int, int, int]]:
+    labels_im, num_labels = segment.label(img_bin, background=255)
+    _, bboxes = segment.segment_characters_with_bboxes(labels_im, num_labels)
+    return [item["bbox"] for item in bboxes]
+
+
+def broken(img_bin: np.ndarray, i: int) -> np.ndarray:
+    """把第 i 個字元從中間橫切成上下兩半"""
+    x_min, y_min, x_max, y_max = bboxes_of(img_bin)[i]
+    out = img_bin.copy()
+    out[(y_min + y_max) // 2, x_min : x_max + 1] = 255
+    return out
+
+
+def fused(img_bin: np.ndarray, i: int) -> np.ndarray:
+    """把第 i + 1 個字元以後的欄位往左移，與第 i 個字元共用一欄"""
+    bboxes = bboxes_of(img_bin)
+    right_edge, left_edge = bboxes[i][2], bboxes[i + 1][0]
+    left = img_bin[:, : right_edge + 1]
+    right = img_bin[:, left_edge:]
+    overlap = np.minimum(left[:, -1:], right[:, :1])
+    out = np.concatenate([left[:, :-1], overlap, right[:, 1:]], axis=1)
+    return np.pad(out, ((0, 0), (0, img_bin.shape[1] - out.shape[1])), constant_values=255)
+
+
+def specked(img_bin: np.ndarray, i: int) -> np.ndarray:
+    """第 i 個字元上下斷開，另一個字元正上方兩像素處有 2x2 的雜點"""
+    out = broken(img_bin, i)
+    j = (i + 1) % 4
+    x_min, y_min, x_max, _ = bboxes_of(img_bin)[j]
+    x = (x_min + x_max) // 2
+    y = max(y_min - 4, 0)
+    out[y : y + 2, x : x + 2] = 0
+    return out
+
+
+def evaluate(name: str, cases: list[tuple[str, np.ndarray]]) -> None:
+    failed_cnt = 0
+    recovered_cnt = 0
+    correct_cnt = 0
+    repair_time = 0.0
+
+    for ans, img_bin in cases:
+        labels_im, num_labels = segment.label(img_bin, background=255)
+
+        if len(segment.segment_characters(labels_im, num_labels)) == 4:
+            continue
+        failed_cnt += 1
+
+        table = segment.find_objects(labels_im, num_labels)
+        start = perf_counter()
+        bboxes = segment.repair_bboxes(labels_im, table)
+        repair_time += perf_counter() - start
+
+        if bboxes is None:
+            continue
+        recovered_cnt += 1
+
+        chars = segment.segment_characters(labels_im, num_labels, repair=True)
+        if eucdist.get_characters(chars) == ans:
+            correct_cnt += 1
+        else:
+            print(f"{name}: expected {ans}, got {eucdist.get_characters(chars)}")
+
+    print(f"{name}")
+    print(f"  Segmentation failures: {failed_cnt} / {len(cases)}")
+    print(f"  Recovered: {recovered_cnt} / {failed_cnt}")
+    print(f"  Recovered and correct (eucdist): {correct_cnt} / {recovered_cnt}")
+    print(f"  Decoded correctly after repair: {correct_cnt} / {failed_cnt}")
+    if failed_cnt:
+        print(f"  Repair time: {repair_time / failed_cnt * 1e6:.1f} us / image")
+
+
+def load(pattern: str) -> list[tuple[str, np.ndarray]]:
+    return [
+        (Path(path).stem, utils.binarize_image(np.array(Image.open(path)), 138))
+        for path in sorted(glob.glob(pattern))
+    ]
+
+
+evaluate("test/segment/failed", load("test/segment/failed/*.bmp"))
+
+success = [(ans, img_bin) for ans, img_bin in load("test/eucdist/success/*.bmp")
+           if len(bboxes_of(img_bin)) == 4]
+for name, make, positions in (
+    ("Synthetic: broken", broken, range(4)),
+    ("Synthetic: fused", fused, range(3)),
+    ("Synthetic: broken + speck", specked, range(4)),
+):
+    evaluate(name, [(ans, make(img_bin, i)) for ans, img_bin in success for i in positions])
@@ -9,12 +9,10 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 import utils
 import segment
 
-image = utils.get_captcha_image()
+image = utils.get_captcha_image(utils.save_captcha("result/captcha.bmp"))
 # image = np.array(Image.open("test/fail cases/CCL_B_0.bmp"))
 
-Image.fromarray(image).save("result/captcha.bmp")
-
-# image_bin = utils.binarize_image(image, utils.ostu_threshold(image))
+# image_bin = utils.binarize_image(image, "auto")
 image_bin = utils.binarize_image(image, 132)
 
 Image.fromarray(image_bin).save("result/captcha_bin.bmp")
@@ -0,0 +1,92 @@
+import multiprocessing
+import shutil
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import template_bank
+from matcher import TemplateMatcher
+
+rng = np.random.default_rng(0)
+glyphs = rng.choice([0, 255], size=(400, 22, 22)).astype(np.uint8)
+
+
+def worker(path: str) -> tuple[bool, int]:
+    """在子行程中開啟同一個模板檔，確認比對器直接使用 memmap。"""
+    bank = template_bank.open_bank(Path(path))
+    matcher = TemplateMatcher(bank.key, bank.wide)
+    matcher.distances(glyphs[:4])
+    return np.shares_memory(matcher.matrix, bank.wide), matcher.matrix.nbytes
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = template_bank.build(path=Path(tmp) / "templates.bank")
+        bank = template_bank.open_bank(path)
+        assert bank.version == template_bank.VERSION
+        assert np.array_equal(bank.glyphs, bank.wide)
+
+        # int64 的 memmap 直接當作比對的矩陣，uint8 模板則轉型成私有的副本
+        shared = TemplateMatcher(bank.key, bank.wide)
+        private = TemplateMatcher(bank.key, list(bank.glyphs))
+        assert np.shares_memory(shared.matrix, bank.wide)
+        assert not np.shares_memory(private.matrix, bank.glyphs)
+        assert np.array_equal(shared.distances(glyphs), private.distances(glyphs))
+        assert np.array_equal(shared.similarities(glyphs), private.similarities(glyphs))
+
+        for name, matcher in (("memmap", shared), ("private copy", private)):
+            start = perf_counter()
+            for _ in range(50):
+                matcher.distances(glyphs)
+            elapsed = (perf_counter() - start) / 50 / len(glyphs)
+            print(f"{name:<13} {elapsed * 1e6:.2f} us / glyph")
+
+        for method in ("fork", "spawn"):
+            with multiprocessing.get_context(method).Pool(2) as pool:
+                results = pool.map(worker, [str(path)] * 2)
+            assert all(shares for shares, _ in results), results
+            print(f"{method:<5} workers share the {results[0][1]:,} bytes of int64 templates")
+
+        # 損毀的檔案要被拒絕
+        data = bytearray(path.read_bytes())
+        data[-1] ^= 1
+        path.write_bytes(bytes(data))
+        try:
+            template_bank.open_bank(path)
+        except ValueError as e:
+            print(f"Corrupted bank rejected: {e}")
+        else:
+            raise AssertionError("corrupted bank should be rejected")
+
+        # 截斷的檔案：open_bank 拋出 ValueError，is_current 視為需要重新編譯
+        for size in (20, template_bank._HEADER.size + 8, len(data) // 2):
+            path.write_bytes(bytes(data[:size]))
+            assert not template_bank.is_current(path)
+            try:
+                template_bank.open_bank(path)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"bank truncated to {size} bytes should be rejected")
+        print("Truncated banks rejected")
+
+        # BMP 修改後模板檔就不是最新的
+        assets = Path(tmp) / "assets"
+        shutil.copytree(template_bank.ASSET_DIR, assets, ignore=shutil.ignore_patterns("*.bank"))
+        path = template_bank.build(assets, assets / "templates.bank")
+        assert template_bank.is_current(path, assets)
+        with open(assets / "7.bmp", "r+b") as f:
+            f.seek(-1, 2)
+            last = f.read(1)
+            f.seek(-1, 2)
+            f.write(bytes([last[0] ^ 0xFF]))
+        assert not template_bank.is_current(path, assets)
+        template_bank.build(assets, path)
+        assert template_bank.is_current(path, assets)
+        print("Stale bank detected after editing 7.bmp")
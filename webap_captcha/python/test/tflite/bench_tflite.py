@@ -0,0 +1,90 @@
+"""
+比較每個字元都重新載入模型（舊版 get_captcha_result）、重複使用 CaptchaModel，
+以及一次 invoke() 處理整批驗證碼的每張驗證碼延遲，
+並確認多個執行緒同時呼叫 tflite.get_captcha_result 的結果正確。
+"""
+
+import glob
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from ai_edge_litert.interpreter import Interpreter
+
+import tflite
+
+
+def get_captcha_result_reload(img: np.ndarray) -> str:
+    """舊版實作：每個字元都建立新的 Interpreter"""
+    img_gray = tflite.convert2gray(img.astype(np.float32))
+    w, h = 85 // 4, 40
+
+    result = ""
+    for i in range(4):
+        target = tflite.normalize(img_gray[0:h, i * w : (i + 1) * w], w, h, 127.5, 255.0)
+
+        interpreter = Interpreter(model_path=tflite.model_path)
+        interpreter.allocate_tensors()
+        input_details = interpreter.get_input_details()
+        output_details = interpreter.get_output_details()
+
+        interpreter.set_tensor(
+            input_details[0]["index"],
+            target[np.newaxis, :, :, np.newaxis].astype(np.float32),
+        )
+        interpreter.invoke()
+        result += tflite.labels[np.argmax(interpreter.get_tensor(output_details[0]["index"]))]
+
+    return result
+
+
+paths = glob.glob("test/*/success/*.bmp")[:200]
+images = [np.array(Image.open(path)) for path in paths]
+
+if not images:
+    raise SystemExit("No captcha found under test/*/success/")
+
+
+def bench(name: str, solve) -> list[str]:
+    start = perf_counter()
+    results = [solve(img) for img in images]
+    elapsed = perf_counter() - start
+    print(f"{name:>32}: {elapsed / len(images) * 1e3:8.3f} ms / captcha")
+    return results
+
+
+before = bench("reload per digit", get_captcha_result_reload)
+
+for num_threads in (None, 1, 2):
+    model = tflite.CaptchaModel(num_threads=num_threads)
+    model.warmup()
+    after = bench(f"CaptchaModel(num_threads={num_threads})", model.get_captcha_result)
+
+    if after != before:
+        print("Results differ from the reload version")
+
+model = tflite.CaptchaModel()
+model.warmup()
+for batch_size in (1, 16, 256):
+    start = perf_counter()
+    batched = model.get_captcha_results(images, batch_size=batch_size)
+    elapsed = perf_counter() - start
+    print(
+        f"{f'get_captcha_results(batch={batch_size})':>32}: "
+        f"{elapsed / len(images) * 1e3:8.3f} ms / captcha"
+    )
+
+    if batched != before:
+        print("Batched results differ from the reload version")
+
+# 模組層級的 get_captcha_result 每個執行緒各有一個模型，同時呼叫也不會互相干擾
+with ThreadPoolExecutor(4) as executor:
+    threaded = list(executor.map(tflite.get_captcha_result, images))
+if threaded != before:
+    print("Threaded results differ from the reload version")
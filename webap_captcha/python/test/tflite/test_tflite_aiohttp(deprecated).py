@@ -1,11 +1,11 @@
 """
 這個腳本經過試驗是錯誤的，可能是因為以異步的方式請求時，伺服器對驗證碼的處理有差異。
 請使用同步版本的腳本 test_tflite.py 來進行測試。
+
+原因是所有登入共用同一個 ClientSession（同一個 cookie jar），伺服器端的驗證碼會互相覆蓋；
+需要並發登入時請改用 webap_helper/python/client.py 的 AsyncWebApClient。
 """
 import aiohttp
-import numpy as np
-from io import BytesIO
-from PIL import Image
 
 from random import random
 import ssl
@@ -15,11 +15,14 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
+import bmp
+from image_sink import ImageSink
 from tflite import get_captcha_result
 
 URL = "https://webap0.nkust.edu.tw/nkust/"
 
 ssl_context = ssl.create_default_context(cafile="nkust.pem")
+sink = ImageSink()
 
 async def login(
     session: aiohttp.ClientSession, url: str, username: str, password: str
@@ -42,9 +45,8 @@ async def login(
     if response_validate.status != 200:
         raise ConnectionError("Failed to get captcha image")
         
-    img = await response_validate.content.read()
-    img = Image.open(BytesIO(img))
-    captcha_answer = get_captcha_result(np.array(img))
+    data = await response_validate.content.read()
+    captcha_answer = get_captcha_result(bmp.decode(data))
 
     if len(captcha_answer) != 4:
         result = False
@@ -60,9 +62,9 @@ async def login(
         result = False
 
     if result:
-        img.save(f'test/tflite/success/{captcha_answer}.bmp')
+        sink.put(f'test/tflite/success/{captcha_answer}.bmp', data)
     else:
-        img.save(f'test/tflite/failed/{captcha_answer}.bmp')
+        sink.put(f'test/tflite/failed/{captcha_answer}.bmp', data)
 
     await session.close()
 
@@ -95,6 +97,9 @@ if __name__ == "__main__":
 
     print(f"Total successful logins: {total} / 10")
 
+    sink.close()
+    print(f"Images: {sink.stats}")
+
     # 並發批次測試
     # TOTAL = 5000
     # BATCH = 10
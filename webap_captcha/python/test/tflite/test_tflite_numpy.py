@@ -0,0 +1,49 @@
+"""
+確認 tflite_numpy 的輸出與 ai_edge_litert 的 Interpreter 在誤差範圍內一致，並比較速度。
+"""
+
+import glob
+from time import perf_counter
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import tflite
+import tflite_numpy
+
+TOLERANCE = 1e-4
+
+paths = glob.glob("test/*/success/*.bmp")[:200]
+images = np.stack([np.array(Image.open(path)) for path in paths])
+
+start = perf_counter()
+numpy_model = tflite_numpy.NumpyCaptchaModel()
+print(f"NumPy model load: {(perf_counter() - start) * 1e3:.2f} ms")
+
+litert_model = tflite.CaptchaModel()
+litert_model.warmup()
+
+digits = litert_model.split_digits(images)
+expected = litert_model.predict(digits)
+actual = numpy_model.predict(digits)
+
+max_diff = np.abs(expected - actual).max()
+argmax_diff = np.count_nonzero(expected.argmax(axis=-1) != actual.argmax(axis=-1))
+print(f"Max abs diff: {max_diff:.2e} (tolerance {TOLERANCE:.0e})")
+print(f"Different predictions: {argmax_diff} / {len(digits)}")
+
+for name, model in (("Interpreter", litert_model), ("NumPy", numpy_model)):
+    start = perf_counter()
+    for img in images:
+        model.get_captcha_result(img)
+    single = (perf_counter() - start) / len(images)
+
+    start = perf_counter()
+    model.get_captcha_results(images)
+    batch = (perf_counter() - start) / len(images)
+
+    print(f"{name:>12}: {single * 1e3:.3f} ms / captcha, {batch * 1e3:.3f} ms / captcha (batch)")
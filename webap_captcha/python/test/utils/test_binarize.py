@@ -0,0 +1,60 @@
+import glob
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import utils
+
+
+def binarize_image_loop(image: np.ndarray, threshold: int) -> np.ndarray:
+    """原本逐像素的實作，作為比對基準"""
+    result = np.zeros((image.shape[0], image.shape[1]), dtype=np.uint8)
+
+    for i in range(image.shape[0]):
+        for j in range(image.shape[1]):
+            I = image[i, j, 0] // 3 + image[i, j, 1] // 3 + image[i, j, 2] // 3
+            if I > threshold:
+                result[i, j] = 255
+            else:
+                result[i, j] = 0
+    return result
+
+
+paths = glob.glob("test/*/success/*.bmp") + glob.glob("test/*/failed/*.bmp")
+
+err_cnt = 0
+images = []
+
+for path in paths:
+    img = np.array(Image.open(path))
+    images.append(img)
+
+    for threshold in (132, 138):
+        if not np.array_equal(
+            utils.binarize_image(img, threshold), binarize_image_loop(img, threshold)
+        ):
+            print(f"Mismatch: {path} (threshold={threshold})")
+            err_cnt += 1
+
+# 批次版本與寫入既有 buffer
+shapes = {img.shape for img in images}
+for shape in shapes:
+    batch = np.stack([img for img in images if img.shape == shape])
+    out = np.empty(batch.shape[:-1], dtype=np.uint8)
+    scratch = np.empty_like(out)
+    result = utils.binarize(batch, 138, out=out, scratch=scratch)
+
+    if result is not out:
+        print(f"Output buffer not reused for shape {shape}")
+        err_cnt += 1
+
+    for img, mask in zip(batch, result):
+        if not np.array_equal(mask, binarize_image_loop(img, 138)):
+            print(f"Batch mismatch for shape {shape}")
+            err_cnt += 1
+
+print(f"Mismatches: {err_cnt} / {len(paths)}")
@@ -0,0 +1,54 @@
+import glob
+import struct
+from io import BytesIO
+from timeit import timeit
+
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import bmp
+
+
+def encode(image: np.ndarray, top_down: bool = False) -> bytes:
+    buffer = BytesIO()
+    Image.fromarray(image).save(buffer, format="BMP")
+    data = buffer.getvalue()
+    if not top_down:
+        return data
+
+    # 把由下而上的 BMP 改寫成負高度、由上而下的版本
+    offset = struct.unpack_from("<I", data, 10)[0]
+    width, height = struct.unpack_from("<ii", data, 18)
+    stride = (len(data) - offset) // height
+    rows = [data[offset + i * stride : offset + (i + 1) * stride] for i in range(height)]
+    header = bytearray(data[:offset])
+    struct.pack_into("<i", header, 22, -height)
+    return bytes(header) + b"".join(reversed(rows))
+
+
+paths = glob.glob("test/eucdist/success/*.bmp")
+rng = np.random.default_rng(0)
+cases = [np.array(Image.open(path).convert("RGB")) for path in paths]
+# 寬度不是 4 的倍數時每列有補齊的 bytes
+cases += [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for h, w in [(1, 1), (7, 5), (40, 83)]]
+
+for image in cases:
+    for top_down in (False, True):
+        data = encode(image, top_down)
+        decoded = bmp.decode(data)
+        assert np.array_equal(decoded, image)
+        assert np.array_equal(decoded, np.array(Image.open(BytesIO(data))))
+        assert np.shares_memory(decoded, np.frombuffer(data, dtype=np.uint8))
+print(f"bmp.decode matches PIL on {len(cases) * 2} images without copying")
+
+data = open(paths[0], "rb").read() if paths else encode(cases[-1])
+number = 10000
+pil = timeit(lambda: np.array(Image.open(BytesIO(data)), dtype=np.uint8), number=number)
+view = timeit(lambda: bmp.decode(data), number=number)
+print(f"PIL:        {pil / number * 1e6:.1f} us / image")
+print(f"bmp.decode: {view / number * 1e6:.1f} us / image ({pil / view:.1f}x)")
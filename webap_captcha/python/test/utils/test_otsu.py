@@ -0,0 +1,71 @@
+import glob
+from PIL import Image
+import numpy as np
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import utils
+
+
+def ostu_threshold_loop(image: np.ndarray) -> int:
+    """原本逐門檻重新加總的實作，作為比對基準"""
+    his = np.zeros(256, dtype=int)
+    for i in range(image.shape[0]):
+        for j in range(image.shape[1]):
+            his[image[i, j]] += 1
+
+    mean_weight = 1.0 / (image.shape[0] * image.shape[1])
+    final_thresh = -1
+    final_value = -1
+    intensity_arr = np.arange(256)
+    for t in range(1, 256):
+        weight_background = np.sum(his[:t]) * mean_weight
+        weight_foreground = np.sum(his[t:]) * mean_weight
+
+        if weight_background == 0 or weight_foreground == 0:
+            continue
+
+        mean_background = np.sum(intensity_arr[:t] * his[:t]) / np.sum(his[:t])
+        mean_foreground = np.sum(intensity_arr[t:] * his[t:]) / np.sum(his[t:])
+
+        value = (
+            weight_background
+            * weight_foreground
+            * (mean_background - mean_foreground) ** 2
+        )
+
+        if value > final_value:
+            final_thresh = t
+            final_value = value
+
+    return final_thresh
+
+
+paths = glob.glob("test/*/success/*.bmp") + glob.glob("test/*/failed/*.bmp")
+
+err_cnt = 0
+grays = []
+
+for path in paths:
+    gray = utils.grayscale(np.array(Image.open(path)))
+    grays.append(gray)
+
+    expected = ostu_threshold_loop(gray)
+    if utils.ostu_threshold(gray) != expected:
+        print(f"Mismatch: {path}")
+        err_cnt += 1
+
+# 批次版本
+shapes = {gray.shape for gray in grays}
+for shape in shapes:
+    batch = np.stack([gray for gray in grays if gray.shape == shape])
+    thresholds = utils.ostu_threshold_batch(batch)
+    for gray, threshold in zip(batch, thresholds):
+        if threshold != ostu_threshold_loop(gray):
+            print(f"Batch mismatch for shape {shape}")
+            err_cnt += 1
+
+print(f"Mismatches: {err_cnt} / {len(paths)}")
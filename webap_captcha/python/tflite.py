@@ -1,18 +1,19 @@
+import threading
 from pathlib import Path
 
 import numpy as np
-from ai_edge_litert.interpreter import Interpreter
 
-model_path = "webap_captcha.tflite"
+# 與目前的工作目錄無關，從任何地方執行都找得到模型
+model_path = str(Path(__file__).resolve().parent / "webap_captcha.tflite")
 
 
 def convert2gray(img: np.ndarray) -> np.ndarray:
     """
-    Convert image to grayscale using YCbCr conversion.
+    Convert image (H, W, 3) or a batch of images (N, H, W, 3) to grayscale using YCbCr conversion.
     [image](https://github.com/brendan-duncan/image/blob/0b22b993b43056040fb7026f2d1a68d461f2f2e0/lib/src/util/color_util.dart#L135)
     """
-    if img.shape[2] == 3:
-        r, g, b = img[:, :, 0], img[:, :, 1], img[:, :, 2]
+    if img.shape[-1] == 3:
+        r, g, b = img[..., 0], img[..., 1], img[..., 2]
         gray = 0.2989 * r + 0.5870 * g + 0.1140 * b
         return gray
     else:
@@ -71,41 +72,111 @@ labels = [
 ]
 
 
-def get_captcha_result(img: np.ndarray) -> str:
-    img_gray = convert2gray(img.astype(np.float32))
+class CaptchaModel:
+    """
+    Load the TFLite model once and reuse its interpreter and allocated tensors.
+    An instance is not thread-safe; use one per thread.
+    """
+
+    digits_count = 4
+    image_height = 40
+    image_width = 85
+
+    def __init__(self, model_path: str = model_path, num_threads: int | None = None):
+        # ai_edge_litert is only available on Linux and macOS, so import it lazily
+        from ai_edge_litert.interpreter import Interpreter
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self._input_index = self.input_details["index"]
+        self._output_index = self.output_details["index"]
+        self._batch_size = int(self.input_details["shape"][0])
+
+    def predict(self, digits: np.ndarray) -> np.ndarray:
+        """
+        Class scores of normalized digits (B, 40, 21), one invoke() for the whole batch.
+        The input tensor is resized whenever the batch size changes.
+        """
+        batch = digits.shape[0]
+        if batch != self._batch_size:
+            self.interpreter.resize_tensor_input(
+                self._input_index, [batch, *digits.shape[1:], 1]
+            )
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch
+
+        self.interpreter.set_tensor(
+            self._input_index,
+            digits[:, :, :, np.newaxis].astype(np.float32),
+        )
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output_index)
 
-    digitsCount = 4
-    imageHeight = 40
-    imageWidth = 85
+    def warmup(self, runs: int = 1) -> None:
+        """Run the model on blank input so the first real captcha pays no setup cost."""
+        w = self.image_width // self.digits_count
+        blank = np.zeros((self.digits_count, self.image_height, w), dtype=np.float32)
+        for _ in range(runs):
+            self.predict(blank)
 
-    target = []
-    result = ""
+    def split_digits(self, images: np.ndarray) -> np.ndarray:
+        """
+        Grayscale, crop and normalize a batch of captchas (N, 40, 85, 3)
+        into digits (N * 4, 40, 21), all vectorized.
+        """
+        img_gray = convert2gray(images.astype(np.float32))
 
-    for i in range(digitsCount):
-        # Crop image
-        w = imageWidth // digitsCount
-        h = imageHeight
-        target = img_gray[0:h, i * w : (i + 1) * w]
+        n = img_gray.shape[0]
+        w = self.image_width // self.digits_count
+        h = self.image_height
 
-        img_normalized = normalize(target, w, h, 127.5, 255.0)
+        # (N, H, 4 * w) -> (N, 4, H, w)
+        digits = img_gray[:, 0:h, 0 : self.digits_count * w]
+        digits = digits.reshape(n, h, self.digits_count, w).transpose(0, 2, 1, 3)
+        digits = digits.reshape(n * self.digits_count, h, w)
 
-        interpreter = Interpreter(model_path=model_path)
-        interpreter.allocate_tensors()
+        return normalize(digits, w, h, 127.5, 255.0)
 
-        input_details = interpreter.get_input_details()
-        output_details = interpreter.get_output_details()
+    def get_captcha_results(
+        self, images: np.ndarray | list[np.ndarray], batch_size: int = 256
+    ) -> list[str]:
+        """Solve many captchas, at most `batch_size` captchas per invoke()."""
+        images = np.asarray(images)
+        results: list[str] = []
 
-        input_shape = input_details[0]["shape"]
-        interpreter.set_tensor(
-            input_details[0]["index"],
-            img_normalized[np.newaxis, :, :, np.newaxis].astype(np.float32),
-        )
+        for start in range(0, images.shape[0], batch_size):
+            digits = self.split_digits(images[start : start + batch_size])
+            indices = np.argmax(self.predict(digits), axis=-1)
+            for row in indices.reshape(-1, self.digits_count):
+                results.append("".join(labels[i] for i in row))
+
+        return results
+
+    def get_captcha_result(self, img: np.ndarray) -> str:
+        return self.get_captcha_results(img[np.newaxis])[0]
 
-        interpreter.invoke()
 
-        output_data = interpreter.get_tensor(output_details[0]["index"])
+_local = threading.local()
+
+
+def get_model() -> CaptchaModel:
+    """
+    The calling thread's model used by `get_captcha_result`, loaded on its
+    first use in that thread. Each thread gets its own, because concurrent
+    `set_tensor`/`invoke` calls on one interpreter are not thread-safe.
+    """
+    model = getattr(_local, "model", None)
+    if model is None:
+        model = _local.model = CaptchaModel()
+    return model
+
+
+def get_captcha_result(img: np.ndarray) -> str:
+    return get_model().get_captcha_result(img)
 
-        digit = labels[np.argmax(output_data)]
-        result += digit
 
-    return result
+def get_captcha_results(images: np.ndarray | list[np.ndarray]) -> list[str]:
+    return get_model().get_captcha_results(images)
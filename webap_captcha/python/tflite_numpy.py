@@ -0,0 +1,305 @@
+"""
+不依賴 ai_edge_litert，直接解析 webap_captcha.tflite 的 flatbuffer，
+以 NumPy 批次執行（im2col 卷積、max pooling、全連接層、softmax）。
+
+只支援模型中用到的 float32 運算子：
+CONV_2D, MAX_POOL_2D, RESHAPE, FULLY_CONNECTED, SOFTMAX。
+
+這是給沒有 ai_edge_litert 的平台（例如 Windows）用的替代方案，不是加速：
+輸出與 Interpreter 一致，但每張驗證碼約慢 3 倍（約 1.7 ms 對 0.55 ms，批次也一樣，
+見 test/tflite/test_tflite_numpy.py）。能用 tflite.py 時請用 tflite.py。
+"""
+
+from __future__ import annotations
+import struct
+from functools import cache
+from typing import Callable
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from tflite import CaptchaModel, model_path
+
+# -----------------------------
+# Flatbuffer
+# -----------------------------
+
+
+class _Table:
+    """最小的 flatbuffer table 讀取器，只實作 TFLite schema 需要的部分。"""
+
+    def __init__(self, buf: bytes, pos: int):
+        self.buf = buf
+        self.pos = pos
+        vtable = pos - struct.unpack_from("<i", buf, pos)[0]
+        self._vtable = vtable
+        self._vtable_size = struct.unpack_from("<H", buf, vtable)[0]
+
+    def _field(self, slot: int) -> int:
+        entry = 4 + 2 * slot
+        if entry >= self._vtable_size:
+            return 0
+        offset = struct.unpack_from("<H", self.buf, self._vtable + entry)[0]
+        return self.pos + offset if offset else 0
+
+    def _deref(self, pos: int) -> int:
+        return pos + struct.unpack_from("<I", self.buf, pos)[0]
+
+    def scalar(self, slot: int, fmt: str, default: int | float = 0) -> int | float:
+        pos = self._field(slot)
+        return struct.unpack_from("<" + fmt, self.buf, pos)[0] if pos else default
+
+    def table(self, slot: int) -> _Table | None:
+        pos = self._field(slot)
+        return _Table(self.buf, self._deref(pos)) if pos else None
+
+    def _vector(self, slot: int) -> tuple[int, int]:
+        pos = self._field(slot)
+        if not pos:
+            return 0, 0
+        vector = self._deref(pos)
+        return vector + 4, struct.unpack_from("<I", self.buf, vector)[0]
+
+    def tables(self, slot: int) -> list[_Table]:
+        start, length = self._vector(slot)
+        return [_Table(self.buf, self._deref(start + 4 * i)) for i in range(length)]
+
+    def array(self, slot: int, dtype: str) -> np.ndarray:
+        start, length = self._vector(slot)
+        return np.frombuffer(self.buf, dtype=dtype, count=length, offset=start)
+
+    def string(self, slot: int) -> str:
+        return self.array(slot, "u1").tobytes().decode("utf-8")
+
+
+# schema.fbs 中用到的列舉值
+_BUILTIN_CONV_2D = 3
+_BUILTIN_FULLY_CONNECTED = 9
+_BUILTIN_MAX_POOL_2D = 17
+_BUILTIN_RESHAPE = 22
+_BUILTIN_SOFTMAX = 25
+
+_PADDING_SAME = 0
+
+_TENSOR_TYPES = {0: np.float32, 1: np.float16, 2: np.int32, 3: np.uint8, 4: np.int64}
+
+_ACTIVATIONS: dict[int, Callable[[np.ndarray], np.ndarray]] = {
+    0: lambda x: x,
+    1: lambda x: np.maximum(x, 0, out=x),  # RELU
+    2: lambda x: np.clip(x, -1, 1, out=x),  # RELU_N1_TO_1
+    3: lambda x: np.clip(x, 0, 6, out=x),  # RELU6
+    4: lambda x: np.tanh(x, out=x),  # TANH
+}
+
+
+# -----------------------------
+# 運算子
+# -----------------------------
+
+
+def _option(options: _Table | None, slot: int, fmt: str, default: int | float) -> int | float:
+    return options.scalar(slot, fmt, default) if options else default
+
+
+def _same_padding(size: int, kernel: int, stride: int) -> tuple[int, int]:
+    out = -(-size // stride)
+    total = max((out - 1) * stride + kernel - size, 0)
+    return total // 2, total - total // 2
+
+
+def _pad(
+    x: np.ndarray, padding: int, kernel: tuple[int, int], stride: tuple[int, int], value: float
+) -> np.ndarray:
+    if padding != _PADDING_SAME:
+        return x
+    pad_h = _same_padding(x.shape[1], kernel[0], stride[0])
+    pad_w = _same_padding(x.shape[2], kernel[1], stride[1])
+    if pad_h == (0, 0) and pad_w == (0, 0):
+        return x
+    return np.pad(x, ((0, 0), pad_h, pad_w, (0, 0)), constant_values=value)
+
+
+def _windows(x: np.ndarray, kernel: tuple[int, int], stride: tuple[int, int]) -> np.ndarray:
+    """(N, H, W, C) -> (N, OH, OW, C, KH, KW) 的 view，不複製。"""
+    windows = sliding_window_view(x, kernel, axis=(1, 2))
+    return windows[:, :: stride[0], :: stride[1]]
+
+
+def _conv_2d(options: _Table | None, weights: np.ndarray, bias: np.ndarray | None):
+    stride = (_option(options, 2, "i", 1), _option(options, 1, "i", 1))
+    dilation = (_option(options, 5, "i", 1), _option(options, 4, "i", 1))
+    padding = _option(options, 0, "b", 0)
+    activation = _ACTIVATIONS[_option(options, 3, "b", 0)]
+
+    out_channels, kh, kw, in_channels = weights.shape
+    if dilation != (1, 1):
+        raise NotImplementedError("Dilated CONV_2D is not supported")
+
+    # (O, KH, KW, C) -> (C * KH * KW, O)，與 im2col 的欄位順序一致
+    matrix = np.ascontiguousarray(
+        weights.transpose(3, 1, 2, 0).reshape(in_channels * kh * kw, out_channels)
+    )
+
+    def run(x: np.ndarray) -> np.ndarray:
+        x = _pad(x, padding, (kh, kw), stride, 0.0)
+        windows = _windows(x, (kh, kw), stride)
+        n, oh, ow = windows.shape[:3]
+        columns = windows.reshape(n * oh * ow, -1)  # im2col
+        y = columns @ matrix
+        if bias is not None:
+            y += bias
+        return activation(y.reshape(n, oh, ow, out_channels))
+
+    return run
+
+
+def _max_pool_2d(options: _Table | None):
+    padding = _option(options, 0, "b", 0)
+    stride = (_option(options, 2, "i", 1), _option(options, 1, "i", 1))
+    kernel = (_option(options, 4, "i", 1), _option(options, 3, "i", 1))
+    activation = _ACTIVATIONS[_option(options, 5, "b", 0)]
+
+    def run(x: np.ndarray) -> np.ndarray:
+        x = _pad(x, padding, kernel, stride, -np.inf)
+        return activation(_windows(x, kernel, stride).max(axis=(-2, -1)))
+
+    return run
+
+
+def _fully_connected(options: _Table | None, weights: np.ndarray, bias: np.ndarray | None):
+    activation = _ACTIVATIONS[_option(options, 0, "b", 0)]
+    matrix = np.ascontiguousarray(weights.T)
+
+    def run(x: np.ndarray) -> np.ndarray:
+        y = x.reshape(-1, matrix.shape[0]) @ matrix
+        if bias is not None:
+            y += bias
+        return activation(y)
+
+    return run
+
+
+def _reshape(shape: np.ndarray):
+    # 第一維永遠是 batch，其餘沿用模型中的形狀
+    tail = [int(v) for v in shape[1:]]
+
+    def run(x: np.ndarray) -> np.ndarray:
+        return x.reshape(x.shape[0], *tail)
+
+    return run
+
+
+def _softmax(options: _Table | None):
+    beta = _option(options, 0, "f", 1.0)
+
+    def run(x: np.ndarray) -> np.ndarray:
+        x = (x - x.max(axis=-1, keepdims=True)) * beta
+        np.exp(x, out=x)
+        x /= x.sum(axis=-1, keepdims=True)
+        return x
+
+    return run
+
+
+# -----------------------------
+# 模型
+# -----------------------------
+
+
+class NumpyModel:
+    """
+    Parse a float32 TFLite model and run it with NumPy, batched over the first axis.
+    """
+
+    def __init__(self, path: str = model_path):
+        with open(path, "rb") as f:
+            buf = f.read()
+        if buf[4:8] != b"TFL3":
+            raise ValueError(f"{path} is not a TFLite model")
+
+        model = _Table(buf, struct.unpack_from("<I", buf, 0)[0])
+        opcodes = [
+            max(code.scalar(3, "i", 0), code.scalar(0, "b", 0))
+            for code in model.tables(1)
+        ]
+        buffers = model.tables(4)
+        subgraph = model.tables(2)[0]
+        tensors = subgraph.tables(0)
+
+        def constant(index: int) -> np.ndarray | None:
+            if index < 0:
+                return None
+            tensor = tensors[index]
+            data = buffers[tensor.scalar(2, "I", 0)]
+            raw = data.array(0, "u1")
+            if raw.size == 0:
+                # 超過 2GB 的模型把資料放在 flatbuffer 之外
+                offset, size = data.scalar(1, "Q", 0), data.scalar(2, "Q", 0)
+                raw = np.frombuffer(buf, dtype=np.uint8, count=size, offset=offset)
+            dtype = _TENSOR_TYPES.get(tensor.scalar(1, "b", 0))
+            if dtype is None:
+                raise NotImplementedError(f"Unsupported tensor type in {tensor.string(3)}")
+            value = np.frombuffer(raw.tobytes(), dtype=dtype).reshape(tensor.array(0, "<i4"))
+            return value.astype(np.float32) if dtype == np.float16 else value
+
+        self.input_index = int(subgraph.array(1, "<i4")[0])
+        self.output_index = int(subgraph.array(2, "<i4")[0])
+        self.input_shape = tuple(int(v) for v in tensors[self.input_index].array(0, "<i4"))
+
+        self.ops: list[tuple[Callable[[np.ndarray], np.ndarray], int, int]] = []
+        for op in subgraph.tables(3):
+            code = opcodes[op.scalar(0, "I", 0)]
+            inputs = [int(i) for i in op.array(1, "<i4")]
+            options = op.table(4)
+
+            if code == _BUILTIN_CONV_2D:
+                run = _conv_2d(options, constant(inputs[1]), constant(inputs[2]))
+            elif code == _BUILTIN_MAX_POOL_2D:
+                run = _max_pool_2d(options)
+            elif code == _BUILTIN_FULLY_CONNECTED:
+                bias = constant(inputs[2]) if len(inputs) > 2 else None
+                run = _fully_connected(options, constant(inputs[1]), bias)
+            elif code == _BUILTIN_RESHAPE:
+                shape = constant(inputs[1]) if len(inputs) > 1 else options.array(0, "<i4")
+                run = _reshape(shape)
+            elif code == _BUILTIN_SOFTMAX:
+                run = _softmax(options)
+            else:
+                raise NotImplementedError(f"Unsupported TFLite operator {code}")
+
+            self.ops.append((run, inputs[0], int(op.array(2, "<i4")[0])))
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """Run the graph on an input batch shaped like the model input, e.g. (N, 40, 21, 1)."""
+        values = {self.input_index: np.asarray(x, dtype=np.float32)}
+        for run, source, target in self.ops:
+            values[target] = run(values[source])
+        return values[self.output_index]
+
+
+class NumpyCaptchaModel(CaptchaModel):
+    """Drop-in replacement of `tflite.CaptchaModel` running on `NumpyModel`."""
+
+    def __init__(self, model_path: str = model_path):
+        self.model = NumpyModel(model_path)
+
+    def predict(self, digits: np.ndarray) -> np.ndarray:
+        """Class scores of normalized digits (B, 40, 21)."""
+        return self.model(digits[:, :, :, np.newaxis])
+
+
+@cache
+def get_model() -> NumpyCaptchaModel:
+    """
+    The shared model used by `get_captcha_result`, loaded on first use.
+    Unlike an interpreter it keeps no state between calls, so threads can share it.
+    """
+    return NumpyCaptchaModel()
+
+
+def get_captcha_result(img: np.ndarray) -> str:
+    return get_model().get_captcha_result(img)
+
+
+def get_captcha_results(images: np.ndarray | list[np.ndarray]) -> list[str]:
+    return get_model().get_captcha_results(images)
@@ -1,97 +1,238 @@
 from __future__ import annotations
-from io import BytesIO
+from typing import Callable, Literal, Sequence
 import numpy as np
 import requests
-from PIL import Image
 import urllib3
 
+import bmp
 
-def get_captcha_image() -> np.ndarray[tuple[int, int], np.dtype[np.uint8]]:
+
+DebugSink = Callable[[bytes], None]
+
+# 預設的二值化門檻；模板（assets/*.bmp）也是以這個門檻產生的。
+# 改成 "auto" 時要先以 character_gen.py（與 fix*.py）重新產生模板，比對時才會一致。
+THRESHOLD: int | Literal["auto"] = 138
+
+
+def save_captcha(path: str = "captcha.bmp") -> DebugSink:
+    """Debug sink writing the raw BMP of every captcha to `path`."""
+
+    def sink(data: bytes) -> None:
+        with open(path, "wb") as f:
+            f.write(data)
+
+    return sink
+
+
+def get_captcha_image(
+    debug_sink: DebugSink | None = None,
+    session: requests.Session | None = None,
+    timeout: float | tuple[float, float] | None = (3.05, 10.0),
+) -> np.ndarray[tuple[int, int, int], np.dtype[np.uint8]]:
     """
-    Get the captcha image from the webap.
+    Get the captcha image from the webap, as a read-only view over the response.
+
+    `debug_sink` receives the raw BMP bytes, e.g. `save_captcha("captcha.bmp")`.
+    `session` reuses its connections and certificate settings, e.g. a
+    `webap_helper` transport session; without it a one-off unverified
+    request is made.
+    `timeout` is the (connect, read) timeout in seconds; None falls back to
+    the session's default, which is no timeout for a plain session.
     """
     captcha_url = "https://webap.nkust.edu.tw/nkust/validateCode.jsp"
+    kwargs = {}
 
-    # Disable warnings for unverified HTTPS requests
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    if session is None:
+        # Disable warnings for unverified HTTPS requests
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        session, kwargs = requests, {"verify": False}
 
-    response = requests.get(
+    response = session.get(
         captcha_url,
-        verify=False,
         headers={
             "User-Agent": "Mozilla/5.0",
             "Referer": "https://webap0.nkust.edu.tw/nkust/",
         },
+        timeout=timeout,
+        **kwargs,
     )
+    response.raise_for_status()
 
-    print("Captcha image status code:", response.status_code)
+    if debug_sink is not None:
+        debug_sink(response.content)
 
-    img = Image.open(BytesIO(response.content))
-    img.save("captcha.bmp")
-
-    return np.array(img, dtype=np.uint8)
+    return bmp.decode(response.content)
 
 
 def histogram(image: np.ndarray) -> np.ndarray:
     """
     Calculate the histogram of the image.
     """
-    hist = np.zeros(256, dtype=int)
-    for i in range(image.shape[0]):
-        for j in range(image.shape[1]):
-            hist[image[i, j]] += 1
-    return hist
+    return np.bincount(np.asarray(image, dtype=np.uint8).ravel(), minlength=256)
+
+
+def histogram_batch(images: np.ndarray) -> np.ndarray:
+    """
+    Calculate the histograms of a stack of images (N, H, W) in one pass.
+    Returns an (N, 256) array.
+    """
+    images = np.asarray(images, dtype=np.uint8)
+    n = images.shape[0]
+    offsets = (np.arange(n, dtype=np.intp) * 256)[:, np.newaxis]
+    indices = images.reshape(n, -1) + offsets
+    return np.bincount(indices.ravel(), minlength=256 * n).reshape(n, 256)
+
+
+def _ostu_from_histograms(hists: np.ndarray) -> np.ndarray:
+    """
+    Otsu thresholds for (N, 256) histograms using cumulative sums, O(256) per image.
+    Threshold t splits the pixels into [0, t) and [t, 256), exactly like the
+    original per-threshold loop; -1 means no valid split exists.
+    """
+    intensity_arr = np.arange(256)
+    pixel_number = hists.sum(axis=1, keepdims=True)
+    mean_weight = 1.0 / pixel_number
+
+    # Candidate t = 1..255, background = his[:t]
+    cum_count = np.cumsum(hists, axis=1)
+    cum_sum = np.cumsum(hists * intensity_arr, axis=1)
+    count_background, sum_background = cum_count[:, :-1], cum_sum[:, :-1]
+    count_foreground = pixel_number - count_background
+    sum_foreground = cum_sum[:, -1:] - sum_background
+
+    weight_background = count_background * mean_weight
+    weight_foreground = count_foreground * mean_weight
+    valid = (count_background > 0) & (count_foreground > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_background = sum_background / count_background
+        mean_foreground = sum_foreground / count_foreground
+
+    # Between Class Variance
+    value = (
+        weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+    )
+    value = np.where(valid, value, -np.inf)
+
+    # argmax keeps the first maximum, matching the original `>` comparison
+    thresholds = np.argmax(value, axis=1) + 1
+    return np.where(valid.any(axis=1), thresholds, -1)
 
 
 def ostu_threshold(image: np.ndarray) -> int:
     """
     Otsu's thresholding method.
     [source](https://en.wikipedia.org/wiki/Otsu%27s_method)
+
+    Color images (H, W, 3) are converted with `grayscale` first.
     """
-    pixel_number = image.shape[0] * image.shape[1]
-    mean_weight = 1.0 / pixel_number
-    his, bins = histogram(image), np.arange(257)
-    final_thresh = -1
-    final_value = -1
-    intensity_arr = np.arange(256)
-    for t in bins[1:-1]:  # Exclude the first and last bin edges
-        weight_background = np.sum(his[:t]) * mean_weight
-        weight_foreground = np.sum(his[t:]) * mean_weight
+    image = np.asarray(image)
+    if image.ndim == 3:
+        image = grayscale(image)
+    return int(_ostu_from_histograms(histogram(image)[np.newaxis])[0])
+
+
+def ostu_threshold_batch(images: np.ndarray) -> np.ndarray:
+    """
+    Otsu's thresholds of a grayscale stack (N, H, W), one per image.
+    """
+    return _ostu_from_histograms(histogram_batch(images))
 
-        if weight_background == 0 or weight_foreground == 0:
-            continue
 
-        mean_background = np.sum(intensity_arr[:t] * his[:t]) / np.sum(his[:t])
-        mean_foreground = np.sum(intensity_arr[t:] * his[t:]) / np.sum(his[t:])
+def grayscale(
+    images: np.ndarray,
+    out: np.ndarray | None = None,
+    scratch: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Convert one image (H, W, 3) or a batch of images (N, H, W, 3) to grayscale
+    with `R // 3 + G // 3 + B // 3`, which never overflows uint8.
 
-        # Calculate Between Class Variance
-        value = (
-            weight_background
-            * weight_foreground
-            * (mean_background - mean_foreground) ** 2
-        )
+    `out` and `scratch` are optional uint8 buffers of shape `images.shape[:-1]`;
+    passing both makes the conversion allocation-free.
+    """
+    images = np.asarray(images)
+    if images.ndim not in (3, 4) or images.shape[-1] < 3:
+        raise ValueError(f"Expected (H, W, 3) or (N, H, W, 3) image, got {images.shape}")
+    if images.dtype != np.uint8:
+        images = images.astype(np.uint8)
+
+    shape = images.shape[:-1]
+    if out is None:
+        out = np.empty(shape, dtype=np.uint8)
+    if scratch is None:
+        scratch = np.empty(shape, dtype=np.uint8)
+
+    np.floor_divide(images[..., 0], 3, out=out)
+    np.floor_divide(images[..., 1], 3, out=scratch)
+    np.add(out, scratch, out=out)
+    np.floor_divide(images[..., 2], 3, out=scratch)
+    np.add(out, scratch, out=out)
+    return out
+
+
+def auto_threshold(gray: np.ndarray) -> int | np.ndarray:
+    """
+    Per-image `binarize` threshold of a grayscale image (H, W) or stack (N, H, W)
+    chosen by Otsu's method.
 
-        # Check if new maximum found
-        if value > final_value:
-            final_thresh = t
-            final_value = value
+    Otsu's t puts [t, 256) in the bright class, so the threshold for the
+    `> threshold` comparison is t - 1. Images without a valid split get -2,
+    which turns them entirely into background (255).
+    """
+    if gray.ndim == 2:
+        return ostu_threshold(gray) - 1
+    thresholds = ostu_threshold_batch(gray) - 1
+    return np.where(thresholds < 0, -2, thresholds)
+
+
+def binarize(
+    images: np.ndarray,
+    threshold: int | Literal["auto"],
+    out: np.ndarray | None = None,
+    scratch: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Binarize one image (H, W, 3) or a batch of images (N, H, W, 3).
 
-    return final_thresh
+    Pixels whose grayscale value (see `grayscale`) is greater than `threshold`
+    become 255, the others 0. The result has shape `images.shape[:-1]`.
+    `threshold="auto"` picks an Otsu threshold per image (see `auto_threshold`).
+    `out` and `scratch` are reused as in `grayscale`, so a hot loop that keeps
+    both buffers around allocates nothing.
+    """
+    out = grayscale(images, out=out, scratch=scratch)
+    if isinstance(threshold, str):
+        if threshold != "auto":
+            raise ValueError(f"Unknown threshold mode: {threshold!r}")
+        threshold = auto_threshold(out)
+        if isinstance(threshold, np.ndarray):
+            threshold = threshold[:, np.newaxis, np.newaxis]
+    np.greater(out, threshold, out=out)
+    np.multiply(out, 255, out=out)
+    return out
+
+
+def binarize_sweep(
+    image: np.ndarray,
+    thresholds: Sequence[int],
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Binarize one image (H, W, 3) with several thresholds at once.
+    The grayscale conversion is done once; the result has shape (K, H, W).
+    """
+    gray = grayscale(image)
+    thresholds = np.asarray(thresholds)[:, np.newaxis, np.newaxis]
+    if out is None:
+        out = np.empty((thresholds.shape[0], *gray.shape), dtype=np.uint8)
+    np.greater(gray, thresholds, out=out)
+    np.multiply(out, 255, out=out)
+    return out
 
 
-def binarize_image(image: np.ndarray, threshold: int) -> np.ndarray:
+def binarize_image(image: np.ndarray, threshold: int | Literal["auto"]) -> np.ndarray:
     """
     Binarize image using the given threshold.
     """
-    result = np.zeros((image.shape[0], image.shape[1]), dtype=np.uint8)
-
-    for i in range(image.shape[0]):
-        for j in range(image.shape[1]):
-            # Convert to grayscale using luminosity method
-            # I = (image[i, j, 0] + image[i, j, 1] + image[i, j, 2]) // 3
-            I = image[i, j, 0] // 3 + image[i, j, 1] // 3 + image[i, j, 2] // 3
-            if I > threshold:
-                result[i, j] = 255
-            else:
-                result[i, j] = 0
-    return result
+    return binarize(image, threshold)
@@ -0,0 +1,121 @@
+"""
+校務系統的斷路器：連續失敗 `failure_threshold` 次後，`reset_timeout` 秒內的請求
+直接拋出 CircuitOpenError，不再卡在逾時上；之後只放行一個探測請求，成功才恢復。
+requests（Transport）與 aiohttp（AsyncWebApClient）都可以使用，只用 requests 時不需要安裝 aiohttp：
+
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    with breaker:
+        async with session.get(url) as response:
+            response.raise_for_status()
+"""
+
+from __future__ import annotations
+import sys
+import threading
+from time import monotonic
+from typing import Literal, TypedDict
+
+import requests
+
+from errors import CircuitOpenError
+
+State = Literal["closed", "open", "half_open"]
+
+
+class BreakerStats(TypedDict):
+    failures: int
+    opened: int  # closed or half-open -> open
+    rejected: int  # requests failed fast while open
+
+
+def is_failure(exc: BaseException) -> bool:
+    """Whether `exc` means the WebAp is down or overloaded, rather than a bad request."""
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code >= 500
+    if isinstance(exc, (TimeoutError, requests.ConnectionError, requests.Timeout)):
+        return True
+    # 只用 requests 的 Transport 不需要安裝 aiohttp；沒有載入 aiohttp 時也不可能是它的例外
+    aiohttp = sys.modules.get("aiohttp")
+    if aiohttp is None:
+        return False
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status >= 500
+    return isinstance(exc, aiohttp.ClientConnectionError)
+
+
+class CircuitBreaker:
+    """
+    Fail fast after `failure_threshold` consecutive failures.
+
+    - closed: requests pass; a success resets the failure count.
+    - open: `check` raises `CircuitOpenError` for `reset_timeout` seconds.
+    - half_open: one probe request passes; its success closes the circuit
+      and its failure opens it again.
+
+    Failures are timeouts, connection errors and 5xx responses (see
+    `is_failure`); other errors mean the server answered and count as
+    successes. It is thread-safe, and `with breaker:` works in both
+    threaded and asyncio code as it never blocks.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        if failure_threshold <= 0:
+            raise ValueError(f"failure_threshold must be positive. Got {failure_threshold}")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state: State = "closed"
+        self.failures = 0
+        self.stats: BreakerStats = {"failures": 0, "opened": 0, "rejected": 0}
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        """Raise `CircuitOpenError` unless a request may be sent now."""
+        with self._lock:
+            if self.state == "open":
+                retry_after = self._opened_at + self.reset_timeout - monotonic()
+                if retry_after > 0:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(retry_after)
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probing:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(0.0)
+                self._probing = True
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+            self._probing = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.stats["failures"] += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.stats["opened"] += 1
+                self.state = "open"
+                self._opened_at = monotonic()
+                self._probing = False
+
+    def record(self, exc: BaseException | None = None) -> None:
+        """Record the outcome of a request that passed `check`."""
+        if exc is None or (isinstance(exc, Exception) and not is_failure(exc)):
+            self.success()
+        elif is_failure(exc):
+            self.failure()
+        else:
+            # 被取消的請求不代表伺服器的狀態，只讓出探測的名額
+            with self._lock:
+                self._probing = False
+
+    def __enter__(self) -> CircuitBreaker:
+        self.check()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.record(exc)
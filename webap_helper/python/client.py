@@ -0,0 +1,268 @@
+"""
+asyncio 版本的校務系統登入：所有登入共用一個 aiohttp 連線池，
+但每次登入都有自己的 ClientSession 與 CookieJar，伺服器端的驗證碼狀態不會互相干擾。
+驗證碼辨識在 executor 中執行，不會卡住 event loop；預設只有一個執行緒，
+因為 tflite.CaptchaModel 與 CascadeBackend.stats 都不是 thread-safe。
+每次登入有一個期限（`deadline`），依比例分給三個請求與辨識；
+校務系統連續失敗時由斷路器直接拋出 CircuitOpenError。
+
+    def solve(data: bytes) -> str:
+        return solver.solve(bmp.decode(data))["text"]
+
+    async with AsyncWebApClient(solve, concurrency=16) as client:
+        results = await client.login_many(accounts)
+"""
+
+from __future__ import annotations
+import asyncio
+import ssl
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from random import random
+from time import perf_counter
+from typing import AsyncContextManager, Callable, Iterable, TypedDict
+
+import aiohttp
+
+from breaker import CircuitBreaker
+from deadline import Deadline
+from errors import DeadlineExceededError
+from transport import CA_FILE, WEBAP_URL
+
+CAPTCHA_ERROR = "驗證碼錯誤"
+
+
+class LoginResult(TypedDict):
+    username: str
+    captcha: str
+    ok: bool  # False when the server rejected the captcha
+    text: str  # body of perchk.jsp
+    timings: dict[str, float]  # seconds spent in each step
+
+
+class AsyncWebApClient:
+    """
+    Log in many accounts concurrently.
+
+    - `solve` maps the raw captcha BMP to its text and runs in `executor`.
+      The default is a private one-thread pool, because one solver shared
+      by several threads races on the TFLite interpreter and on the
+      cascade's stats. Pass a larger executor only with a thread-safe
+      `solve`, e.g. one that keeps a solver per thread.
+    - At most `concurrency` logins run at once; they share a TCPConnector
+      with `pool_size` connections (default `concurrency`) kept alive for
+      `keepalive_timeout` seconds.
+    - `timeout` is the total time allowed for each request, and `deadline`
+      the time allowed for a whole login once it has a concurrency slot,
+      split over its steps by `Deadline`. A step past its share raises
+      `DeadlineExceededError`.
+    - Every request goes through `breaker` (a default `CircuitBreaker`
+      when None), which raises `CircuitOpenError` while the WebAp is down.
+    - `limiter` replaces the fixed `concurrency` semaphore, e.g. with an
+      `AIMDController` that adapts the limits to the server.
+    """
+
+    def __init__(
+        self,
+        solve: Callable[[bytes], str],
+        base_url: str = WEBAP_URL,
+        concurrency: int = 8,
+        pool_size: int | None = None,
+        timeout: float = 10.0,
+        deadline: float = 30.0,
+        keepalive_timeout: float = 15.0,
+        ca_file: str | Path = CA_FILE,
+        executor: Executor | None = None,
+        limiter: AsyncContextManager | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.solve = solve
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.pool_size = pool_size or concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.deadline = deadline
+        self.keepalive_timeout = keepalive_timeout
+        self.ssl_context = ssl.create_default_context(cafile=str(ca_file))
+        # 預設的單執行緒 executor 由 client 在 open() 建立、close() 關閉
+        self._owns_executor = executor is None
+        self.executor = executor
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        self._connector: aiohttp.TCPConnector | None = None
+        # 限制同時進行中的登入；其他送出請求的元件（例如 session_pool）也共用它
+        self.semaphore: AsyncContextManager | None = None
+
+    async def __aenter__(self) -> AsyncWebApClient:
+        self.open()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def open(self) -> None:
+        """Create the shared connector; must be called inside the event loop."""
+        if self._connector is None:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                ssl=self.ssl_context,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self.semaphore = self.limiter or asyncio.Semaphore(self.concurrency)
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(1, thread_name_prefix="captcha")
+
+    async def close(self) -> None:
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+        if self._owns_executor and self.executor is not None:
+            # 不等待辨識跑完，避免卡住 event loop
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def session(self) -> aiohttp.ClientSession:
+        """A session with its own cookie jar on the shared connector."""
+        if self._connector is None:
+            raise RuntimeError("AsyncWebApClient is not open")
+        return aiohttp.ClientSession(
+            connector=self._connector,
+            connector_owner=False,
+            cookie_jar=aiohttp.CookieJar(),
+            timeout=self.timeout,
+            headers={"User-Agent": "Mozilla/5.0", "Referer": self.base_url},
+        )
+
+    async def _solve(self, data: bytes, deadline: Deadline) -> str:
+        loop = asyncio.get_running_loop()
+        budget = deadline.budget("solve")
+        try:
+            # 逾時只會讓呼叫端不再等待，executor 中的辨識仍會跑完；
+            # 用 asyncio.timeout 而不是 wait_for，取消時不會吞掉 CancelledError
+            async with asyncio.timeout(budget):
+                return await loop.run_in_executor(self.executor, self.solve, data)
+        except asyncio.TimeoutError as exc:
+            raise DeadlineExceededError("solve", deadline.total) from exc
+
+    async def _request(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        path: str,
+        step: str,
+        deadline: Deadline,
+        text: bool = False,
+        **kwargs,
+    ) -> bytes | str:
+        """
+        One request of `step` within its share of `deadline`, through the
+        breaker; returns the body, decoded when `text`.
+        """
+        timeout = aiohttp.ClientTimeout(total=min(deadline.budget(step), self.timeout.total))
+        try:
+            with self.breaker:
+                async with session.request(
+                    method, self.url(path), timeout=timeout, **kwargs
+                ) as response:
+                    response.raise_for_status()
+                    return await (response.text() if text else response.read())
+        except asyncio.TimeoutError as exc:
+            raise DeadlineExceededError(step, deadline.total) from exc
+
+    async def prepare(
+        self, session: aiohttp.ClientSession, deadline: Deadline | None = None
+    ) -> tuple[str, dict[str, float]]:
+        """Open index.html and fetch and solve the captcha; returns (captcha, timings)."""
+        deadline = deadline or Deadline(self.deadline)
+        timings: dict[str, float] = {}
+
+        start = perf_counter()
+        await self._request(session, "GET", "index.html", "index", deadline)
+        timings["index"] = perf_counter() - start
+
+        start = perf_counter()
+        data = await self._request(
+            session, "GET", f"validateCode.jsp?it={random()}", "captcha", deadline
+        )
+        timings["captcha"] = perf_counter() - start
+
+        start = perf_counter()
+        captcha = await self._solve(data, deadline)
+        timings["solve"] = perf_counter() - start
+        return captcha, timings
+
+    async def submit(
+        self,
+        session: aiohttp.ClientSession,
+        username: str,
+        password: str,
+        captcha: str,
+        timings: dict[str, float] | None = None,
+        deadline: Deadline | None = None,
+    ) -> LoginResult:
+        """POST perchk.jsp with the captcha prepared on the same session."""
+        deadline = deadline or Deadline(self.deadline)
+        timings = {} if timings is None else timings
+
+        start = perf_counter()
+        payload = {"uid": username, "pwd": password, "etxt_code": captcha}
+        text = await self._request(
+            session, "POST", "perchk.jsp", "login", deadline, text=True, data=payload
+        )
+        timings["login"] = perf_counter() - start
+
+        return {
+            "username": username,
+            "captcha": captcha,
+            "ok": CAPTCHA_ERROR not in text,
+            "text": text,
+            "timings": timings,
+        }
+
+    async def login_with(
+        self, session: aiohttp.ClientSession, username: str, password: str
+    ) -> LoginResult:
+        """Run index.html -> validateCode.jsp -> perchk.jsp on `session` within one deadline."""
+        deadline = Deadline(self.deadline)
+        captcha, timings = await self.prepare(session, deadline)
+        return await self.submit(session, username, password, captcha, timings, deadline)
+
+    async def login(self, username: str, password: str) -> LoginResult:
+        """Log in once in a fresh session, waiting for a free concurrency slot."""
+        self.open()
+        async with self.semaphore:
+            async with self.session() as session:
+                return await self.login_with(session, username, password)
+
+    async def open_session(
+        self, username: str, password: str
+    ) -> tuple[aiohttp.ClientSession | None, LoginResult]:
+        """
+        Like `login`, but keep the session open when the login succeeded so
+        its cookies can be reused; the caller closes it. The session is None
+        when the captcha was rejected.
+        """
+        self.open()
+        session = self.session()
+        try:
+            async with self.semaphore:
+                result = await self.login_with(session, username, password)
+        except BaseException:
+            await session.close()
+            raise
+        if not result["ok"]:
+            await session.close()
+            return None, result
+        return session, result
+
+    async def login_many(
+        self, accounts: Iterable[tuple[str, str]]
+    ) -> list[LoginResult | BaseException]:
+        """Log in every (username, password); failed logins return their exception."""
+        return await asyncio.gather(
+            *(self.login(username, password) for username, password in accounts),
+            return_exceptions=True,
+        )
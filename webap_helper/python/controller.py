@@ -0,0 +1,201 @@
+"""
+依校務系統的實際狀況調整流量（AIMD）：回應正常時慢慢增加同時進行的登入數與每秒請求數，
+遇到逾時、連線錯誤、429/5xx 或延遲過高時立刻減半。
+
+AIMDController 可以直接取代 AsyncWebApClient 的 semaphore，
+client、PresolvedPool、SessionCache 送出的請求都會自動套用目前的上限：
+
+    controller = AIMDController(max_concurrency=64)
+    async with AsyncWebApClient(solve, limiter=controller) as client:
+        results = await client.login_many(accounts)
+    controller.limits  # concurrency, rate, in_flight, latency
+"""
+
+from __future__ import annotations
+import asyncio
+from time import monotonic
+from typing import Callable, TypedDict
+
+import aiohttp
+
+# 代表伺服器過載的 HTTP 狀態碼
+OVERLOAD_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class Limits(TypedDict):
+    concurrency: int  # in-flight requests allowed
+    rate: float  # requests started per second
+    in_flight: int
+    latency: float  # exponential moving average in seconds
+
+
+class ControllerStats(TypedDict):
+    successes: int
+    slow: int  # successes above `latency_target`
+    timeouts: int
+    errors: int  # connection errors and overload statuses
+    decreases: int
+
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease limits on concurrency and rate.
+
+    Use it as an async context manager around every request (or login):
+    entering waits for a free slot and for the rate pacing, and exiting
+    records the outcome.
+
+    - A success below `latency_target` adds about `increase` to the
+      concurrency and `rate_increase` to the rate per window of
+      `concurrency` successes.
+    - A timeout, a connection error, an overload status (429, 5xx) or a
+      success slower than `latency_target` multiplies both by `decrease`,
+      at most once per `cooldown` seconds, so one burst of failures from
+      the same window only counts once.
+    - Other exceptions (e.g. a rejected captcha) do not change the limits.
+    - Hooks added with `add_hook` are called with `limits` after every
+      decrease and whenever the integer concurrency grows.
+    """
+
+    def __init__(
+        self,
+        concurrency: float = 4.0,
+        rate: float = 20.0,
+        min_concurrency: float = 1.0,
+        max_concurrency: float = 64.0,
+        min_rate: float = 1.0,
+        max_rate: float = 500.0,
+        increase: float = 1.0,
+        rate_increase: float = 5.0,
+        decrease: float = 0.5,
+        latency_target: float = 2.0,
+        cooldown: float = 1.0,
+        alpha: float = 0.1,
+    ):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.rate_increase = rate_increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.alpha = alpha
+
+        self.latency = 0.0
+        self.in_flight = 0
+        self.stats: ControllerStats = {
+            "successes": 0,
+            "slow": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "decreases": 0,
+        }
+        self._hooks: list[Callable[[Limits], None]] = []
+        self._condition: asyncio.Condition | None = None
+        self._next_start = 0.0
+        self._last_decrease = float("-inf")
+        self._starts: dict[asyncio.Task, list[float]] = {}
+
+    @property
+    def limits(self) -> Limits:
+        return {
+            "concurrency": int(self.concurrency),
+            "rate": self.rate,
+            "in_flight": self.in_flight,
+            "latency": self.latency,
+        }
+
+    def add_hook(self, hook: Callable[[Limits], None]) -> None:
+        """Call `hook(limits)` whenever the limits change."""
+        self._hooks.append(hook)
+
+    def _notify(self) -> None:
+        limits = self.limits
+        for hook in self._hooks:
+            hook(limits)
+
+    async def __aenter__(self) -> AIMDController:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.concurrency))
+            self.in_flight += 1
+
+        # 依 rate 平均分散每個請求的開始時間；取得 slot 之後才排時間，才會用到最新的 rate
+        now = monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + 1.0 / self.rate
+        if start > now:
+            try:
+                await asyncio.sleep(start - now)
+            except BaseException:
+                # 被取消時 __aexit__ 不會執行，要自己歸還 slot
+                self.in_flight -= 1
+                async with self._condition:
+                    self._condition.notify_all()
+                raise
+
+        self._starts.setdefault(asyncio.current_task(), []).append(monotonic())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        task = asyncio.current_task()
+        starts = self._starts[task]
+        elapsed = monotonic() - starts.pop()
+        if not starts:
+            del self._starts[task]
+
+        # 先釋放 slot 再等待 lock，等待中被取消也不會少算
+        self.in_flight -= 1
+        self.record(elapsed, exc)
+        # 上限可能剛提高，讓所有等待中的請求重新檢查
+        async with self._condition:
+            self._condition.notify_all()
+
+    def record(self, elapsed: float, exc: BaseException | None = None) -> None:
+        """Feed one outcome: the elapsed seconds and the exception it raised, if any."""
+        if exc is None:
+            self.stats["successes"] += 1
+            if self.stats["successes"] == 1:
+                self.latency = elapsed
+            else:
+                self.latency += self.alpha * (elapsed - self.latency)
+            if elapsed > self.latency_target:
+                self.stats["slow"] += 1
+                self._decrease()
+            else:
+                self._increase()
+        elif isinstance(exc, asyncio.TimeoutError):
+            self.stats["timeouts"] += 1
+            self._decrease()
+        elif isinstance(exc, aiohttp.ClientResponseError):
+            if exc.status in OVERLOAD_STATUS:
+                self.stats["errors"] += 1
+                self._decrease()
+        elif isinstance(exc, aiohttp.ClientConnectionError):
+            self.stats["errors"] += 1
+            self._decrease()
+
+    def _increase(self) -> None:
+        # 每個成功的請求只加 1/concurrency，一整個視窗的請求都成功才加 increase
+        before = int(self.concurrency)
+        window = max(self.concurrency, 1.0)
+        self.concurrency = min(self.concurrency + self.increase / window, self.max_concurrency)
+        self.rate = min(self.rate + self.rate_increase / window, self.max_rate)
+        if int(self.concurrency) != before:
+            self._notify()
+
+    def _decrease(self) -> None:
+        now = monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.stats["decreases"] += 1
+        self.concurrency = max(self.concurrency * self.decrease, self.min_concurrency)
+        self.rate = max(self.rate * self.decrease, self.min_rate)
+        self._notify()
@@ -0,0 +1,49 @@
+"""
+每次登入的期限：整體的時間預算依比例分給 index.html、validateCode.jsp、驗證碼辨識與 perchk.jsp，
+前面的步驟提早完成時，省下的時間留給後面的步驟。
+
+    deadline = Deadline(30.0)
+    session.get(transport.url("index.html"), timeout=deadline.budget("index"))
+"""
+
+from __future__ import annotations
+from time import monotonic
+from typing import Mapping
+
+from errors import DeadlineExceededError
+
+# 各步驟分到的比例；perchk.jsp 要驗證帳號密碼，通常最慢
+STEP_SHARES = {"index": 0.2, "captcha": 0.2, "solve": 0.2, "login": 0.4}
+
+
+class Deadline:
+    """
+    A budget of `total` seconds for one login, split over the steps in `shares`.
+
+    `budget(step)` is the time left minus the shares reserved for the steps
+    after `step`: each step gets at least its own share, plus whatever the
+    earlier steps did not use. It raises `DeadlineExceededError` when
+    nothing is left.
+    """
+
+    def __init__(self, total: float, shares: Mapping[str, float] = STEP_SHARES):
+        if total <= 0:
+            raise ValueError(f"total must be positive. Got {total}")
+        self.total = total
+        self.expires = monotonic() + total
+        weight = sum(shares.values())
+        self._reserved: dict[str, float] = {}
+        later = 0.0
+        for step in reversed(list(shares)):
+            self._reserved[step] = later
+            later += total * shares[step] / weight
+
+    def remaining(self) -> float:
+        return max(self.expires - monotonic(), 0.0)
+
+    def budget(self, step: str) -> float:
+        """Seconds `step` may take."""
+        budget = self.expires - monotonic() - self._reserved[step]
+        if budget <= 0:
+            raise DeadlineExceededError(step, self.total)
+        return budget
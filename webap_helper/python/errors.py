@@ -0,0 +1,35 @@
+"""
+webap_helper 會拋出的錯誤，全部繼承自 WebApError，呼叫端可以只接一種例外。
+"""
+
+
+class WebApError(Exception):
+    """Base class of the errors raised by webap_helper."""
+
+
+class LoginError(WebApError):
+    """Every login attempt was rejected, e.g. the captcha was wrong each time."""
+
+
+class SessionExpiredError(WebApError):
+    """The session was reported expired again right after logging in."""
+
+
+class DeadlineExceededError(WebApError, TimeoutError):
+    """A login step ran out of its share of the login deadline."""
+
+    def __init__(self, step: str, deadline: float):
+        super().__init__(f"{step} timed out within the {deadline:g} s login deadline")
+        self.step = step
+        self.deadline = deadline
+
+
+class CircuitOpenError(WebApError):
+    """
+    The WebAp failed repeatedly and requests fail fast; the next probe is
+    allowed in `retry_after` seconds (0 while a probe is in flight).
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"WebAp is failing; retry in {retry_after:.1f} s")
+        self.retry_after = retry_after
@@ -0,0 +1,247 @@
+"""
+已登入 session 的快取：以帳號為 key 保存登入後的 cookie，
+呼叫校務系統的 API 時不必每次都重新登入（三個請求加上一次驗證碼辨識）。
+
+    async with AsyncWebApClient(solve) as client:
+        cache = SessionCache(client, ttl=600)
+        html = await cache.fetch(username, password, "ag_pro/ag008.jsp", method="POST", data=...)
+        cache.stats  # hits, misses, logins, coalesced, ...
+        await cache.close()
+"""
+
+from __future__ import annotations
+import asyncio
+import hashlib
+import hmac
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import AsyncIterator, Awaitable, Callable, Sequence, TypedDict
+
+import aiohttp
+
+from client import AsyncWebApClient, LoginResult
+from errors import LoginError, SessionExpiredError
+
+# 校務系統的 session 過期時，回應中會出現的字串
+EXPIRED_MARKERS = ("逾時", "重新登入")
+
+# 驗證碼正確但登入失敗（帳號密碼錯誤、帳號被鎖定或停用）時，perchk.jsp 回應中會出現的字串
+LOGIN_FAILED_MARKERS = ("密碼錯誤", "無此帳號", "鎖定", "停用")
+
+# 每個 session 除了 cookie 以外的估計記憶體用量（ClientSession 與 CookieJar 物件）
+SESSION_OVERHEAD = 4096
+
+Login = Callable[[str, str], Awaitable[tuple[aiohttp.ClientSession | None, LoginResult]]]
+
+
+class CacheStats(TypedDict):
+    hits: int
+    misses: int
+    logins: int  # login attempts, including rejected captchas
+    coalesced: int  # callers that waited for a login already in flight
+    expired: int  # sessions dropped after `ttl` without use
+    relogins: int  # sessions the server reported expired
+    evictions: int  # sessions dropped by `max_sessions` or `max_bytes`
+
+
+class _Entry:
+    __slots__ = ("session", "digest", "last_used", "size", "users", "dropped")
+
+    def __init__(self, session: aiohttp.ClientSession, digest: bytes):
+        self.session = session
+        self.digest = digest
+        self.last_used = monotonic()
+        # 使用中的 session 被移出快取時，等最後一個使用者結束才關閉
+        self.users = 0
+        self.dropped = False
+        self.size = SESSION_OVERHEAD + sum(
+            len(cookie.key) + len(cookie.value) for cookie in session.cookie_jar
+        )
+
+
+class SessionCache:
+    """
+    LRU cache of authenticated sessions keyed by username.
+
+    - A session unused for `ttl` seconds is dropped, as the server would
+      have expired it anyway.
+    - Beyond `max_sessions` sessions or an estimated `max_bytes`, the least
+      recently used ones are closed.
+    - `fetch` detects expired sessions with `expired_markers` and logs in
+      again once, transparently.
+    - A login whose perchk.jsp contains one of `failed_markers` (wrong
+      password, locked account) is never cached: it raises `LoginError`
+      at once, without spending the remaining `login_attempts`.
+    - Concurrent requests for the same account share one login.
+    - `login` defaults to `client.open_session`; pass
+      `PresolvedPool.open_session` to log in from pre-solved sessions.
+    - A cached session is only handed out for the password it was created
+      with; only a digest of the password is kept.
+    """
+
+    def __init__(
+        self,
+        client: AsyncWebApClient,
+        ttl: float = 600.0,
+        max_sessions: int = 256,
+        max_bytes: int = 4 << 20,
+        login: Login | None = None,
+        login_attempts: int = 3,
+        expired_markers: Sequence[str] = EXPIRED_MARKERS,
+        failed_markers: Sequence[str] = LOGIN_FAILED_MARKERS,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.login = login or client.open_session
+        self.login_attempts = login_attempts
+        self.expired_markers = tuple(expired_markers)
+        self.failed_markers = tuple(failed_markers)
+        self.stats: CacheStats = {
+            "hits": 0,
+            "misses": 0,
+            "logins": 0,
+            "coalesced": 0,
+            "expired": 0,
+            "relogins": 0,
+            "evictions": 0,
+        }
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[tuple[str, bytes], asyncio.Future[aiohttp.ClientSession]] = {}
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def memory(self) -> int:
+        """Estimated bytes held by the cached sessions."""
+        return self._bytes
+
+    @staticmethod
+    def _digest(username: str, password: str) -> bytes:
+        return hashlib.sha256(f"{username}\0{password}".encode()).digest()
+
+    def is_expired(self, text: str) -> bool:
+        return any(marker in text for marker in self.expired_markers)
+
+    def is_failed(self, text: str) -> bool:
+        return any(marker in text for marker in self.failed_markers)
+
+    async def _drop(self, username: str) -> None:
+        entry = self._entries.pop(username)
+        self._bytes -= entry.size
+        entry.dropped = True
+        if entry.users == 0:
+            await entry.session.close()
+
+    async def _release(self, entry: _Entry) -> None:
+        entry.users -= 1
+        if entry.dropped and entry.users == 0:
+            await entry.session.close()
+
+    async def _store(self, username: str, entry: _Entry) -> None:
+        if username in self._entries:
+            await self._drop(username)
+        self._entries[username] = entry
+        self._bytes += entry.size
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_sessions or self._bytes > self.max_bytes
+        ):
+            await self._drop(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    async def _login(self, username: str, password: str, digest: bytes) -> _Entry:
+        for _ in range(self.login_attempts):
+            self.stats["logins"] += 1
+            session, result = await self.login(username, password)
+            if session is not None and self.is_failed(result["text"]):
+                # 帳號密碼錯誤時再試也一樣，不要把沒登入的 session 放進快取
+                await session.close()
+                raise LoginError(f"Login of {username} was rejected by the WebAp")
+            if session is not None:
+                entry = _Entry(session, digest)
+                await self._store(username, entry)
+                return entry
+        raise LoginError(f"Login of {username} failed {self.login_attempts} times")
+
+    async def _acquire(self, username: str, password: str) -> _Entry:
+        digest = self._digest(username, password)
+        while True:
+            entry = self._entries.get(username)
+            if entry is not None and monotonic() - entry.last_used >= self.ttl:
+                await self._drop(username)
+                self.stats["expired"] += 1
+                continue
+            if entry is not None and hmac.compare_digest(entry.digest, digest):
+                self.stats["hits"] += 1
+                entry.last_used = monotonic()
+                self._entries.move_to_end(username)
+                entry.users += 1
+                return entry
+
+            key = (username, digest)
+            future = self._inflight.get(key)
+            if future is None:
+                self.stats["misses"] += 1
+                future = asyncio.ensure_future(self._login(username, password, digest))
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            else:
+                self.stats["coalesced"] += 1
+            # 單一呼叫端被取消時，不影響其他等待同一次登入的呼叫端
+            entry = await asyncio.shield(future)
+            # 等待期間 session 可能已經被擠出快取
+            if not entry.dropped:
+                entry.users += 1
+                return entry
+
+    @asynccontextmanager
+    async def session(self, username: str, password: str) -> AsyncIterator[aiohttp.ClientSession]:
+        """
+        A logged-in session of the account, from the cache or a new login.
+        It stays open until the block exits, even if it is evicted meanwhile.
+        """
+        entry = await self._acquire(username, password)
+        try:
+            yield entry.session
+        finally:
+            await self._release(entry)
+
+    async def invalidate(self, username: str, session: aiohttp.ClientSession | None = None) -> bool:
+        """
+        Forget the account's session (only if it is still `session`, when
+        given). Returns whether a session was dropped.
+        """
+        entry = self._entries.get(username)
+        if entry is None or (session is not None and entry.session is not session):
+            return False
+        await self._drop(username)
+        return True
+
+    async def fetch(
+        self, username: str, password: str, path: str, method: str = "GET", **kwargs
+    ) -> str:
+        """
+        Request `path` with the account's session and return the body.
+        An expired session is replaced by a new login and the request retried once.
+        """
+        for _ in range(2):
+            async with self.session(username, password) as session:
+                async with self.client.semaphore:
+                    async with session.request(method, self.client.url(path), **kwargs) as response:
+                        response.raise_for_status()
+                        text = await response.text()
+                if not self.is_expired(text):
+                    return text
+                # 同一個 session 的其他並發請求也會看到過期，只有第一個需要丟掉它
+                if await self.invalidate(username, session):
+                    self.stats["relogins"] += 1
+        raise SessionExpiredError(f"Session of {username} expired right after logging in")
+
+    async def close(self) -> None:
+        """Close every cached session."""
+        while self._entries:
+            await self._drop(next(iter(self._entries)))
@@ -0,0 +1,176 @@
+"""
+預先準備好的登入 session：背景持續保持 N 個已經開過 index.html、
+取得並辨識完驗證碼的 session，需要登入時只剩 perchk.jsp 一個 POST。
+
+    async with AsyncWebApClient(solve) as client, PresolvedPool(client, size=4, ttl=60) as pool:
+        result = await pool.login(username, password)
+        pool.stats  # hits, misses, stale, ...
+"""
+
+from __future__ import annotations
+import asyncio
+from collections import deque
+from time import monotonic, perf_counter
+from typing import NamedTuple, TypedDict
+
+import aiohttp
+
+from client import AsyncWebApClient, LoginResult
+
+
+class PreparedSession(NamedTuple):
+    session: aiohttp.ClientSession
+    captcha: str
+    prepared_at: float  # monotonic()
+    timings: dict[str, float]
+
+
+class PoolStats(TypedDict):
+    hits: int  # logins served by a prepared session
+    misses: int  # logins that had to prepare a session themselves
+    stale: int  # prepared sessions discarded unused after `ttl`
+    prepared: int  # sessions prepared in the background
+    errors: int  # failed background preparations
+
+
+class PresolvedPool:
+    """
+    Keep `size` sessions with a solved captcha ready ahead of demand.
+
+    A session is discarded once it is `ttl` seconds old, so `ttl` must be
+    shorter than the server-side session and captcha lifetime; the filler
+    replaces it right away. Sessions are handed out oldest first, which
+    wastes fewer of them than handing out the freshest. Background
+    preparations share `client.semaphore` with the logins, so they never
+    exceed the client's concurrency.
+    """
+
+    def __init__(
+        self,
+        client: AsyncWebApClient,
+        size: int = 4,
+        ttl: float = 60.0,
+        retry_delay: float = 1.0,
+    ):
+        if size <= 0:
+            raise ValueError(f"size must be positive. Got {size}")
+        self.client = client
+        self.size = size
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+        self.stats: PoolStats = {"hits": 0, "misses": 0, "stale": 0, "prepared": 0, "errors": 0}
+        self._ready: deque[PreparedSession] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._ready)
+
+    async def __aenter__(self) -> PresolvedPool:
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        """Start filling the pool in the background."""
+        if self._task is None:
+            self.client.open()
+            self._task = asyncio.create_task(self._fill())
+
+    async def close(self) -> None:
+        """Stop the filler and close the prepared sessions."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._ready:
+            await self._ready.popleft().session.close()
+
+    async def _prepare(self) -> PreparedSession:
+        session = self.client.session()
+        try:
+            async with self.client.semaphore:
+                captcha, timings = await self.client.prepare(session)
+        except BaseException:
+            await session.close()
+            raise
+        return PreparedSession(session, captcha, monotonic(), timings)
+
+    async def _evict(self) -> None:
+        now = monotonic()
+        while self._ready and now - self._ready[0].prepared_at >= self.ttl:
+            await self._ready.popleft().session.close()
+            self.stats["stale"] += 1
+
+    async def _fill(self) -> None:
+        while True:
+            await self._evict()
+            missing = self.size - len(self._ready)
+            if missing > 0:
+                results = await asyncio.gather(
+                    *(self._prepare() for _ in range(missing)), return_exceptions=True
+                )
+                failed = False
+                for result in results:
+                    if isinstance(result, PreparedSession):
+                        self._ready.append(result)
+                        self.stats["prepared"] += 1
+                    else:
+                        self.stats["errors"] += 1
+                        failed = True
+                if failed:
+                    await asyncio.sleep(self.retry_delay)
+                continue
+
+            # 等到有 session 被取走，或最舊的 session 過期
+            self._wakeup.clear()
+            timeout = self._ready[0].prepared_at + self.ttl - monotonic()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def acquire(self) -> PreparedSession:
+        """A prepared session (a hit), or a newly prepared one (a miss)."""
+        await self._evict()
+        self._wakeup.set()
+        if self._ready:
+            self.stats["hits"] += 1
+            return self._ready.popleft()
+        self.stats["misses"] += 1
+        return await self._prepare()
+
+    async def open_session(
+        self, username: str, password: str
+    ) -> tuple[aiohttp.ClientSession | None, LoginResult]:
+        """
+        Log in with a prepared session and keep it open when the login
+        succeeded, like `AsyncWebApClient.open_session`.
+        """
+        start = perf_counter()
+        prepared = await self.acquire()
+        timings = {"acquire": perf_counter() - start}
+        try:
+            async with self.client.semaphore:
+                result = await self.client.submit(
+                    prepared.session, username, password, prepared.captcha, timings
+                )
+        except BaseException:
+            await prepared.session.close()
+            raise
+        if not result["ok"]:
+            await prepared.session.close()
+            return None, result
+        return prepared.session, result
+
+    async def login(self, username: str, password: str) -> LoginResult:
+        """Log in with a prepared session; only perchk.jsp is left on the critical path."""
+        session, result = await self.open_session(username, password)
+        if session is not None:
+            await session.close()
+        return result
@@ -0,0 +1,89 @@
+"""
+以本地的 HTTPS 伺服器模擬校務系統卡住再恢復：比較沒有期限的登入、
+有期限的登入，以及期限加上斷路器時，每次登入等待的時間與拋出的錯誤。
+"""
+
+import asyncio
+import tempfile
+from collections import Counter
+from pathlib import Path
+from statistics import mean
+from time import perf_counter
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import stand_in
+from breaker import CircuitBreaker
+from client import AsyncWebApClient
+
+LOGINS = 40
+STALL = 60.0  # 卡住的伺服器每個請求多等的秒數
+PATIENCE = 5.0  # 沒有期限時，呼叫端最多等這麼久就放棄量測
+
+
+async def measure(client: AsyncWebApClient) -> tuple[Counter, list[float]]:
+    outcomes: Counter = Counter()
+    latencies: list[float] = []
+
+    async def one() -> None:
+        start = perf_counter()
+        try:
+            result = await asyncio.wait_for(client.login("user", "password"), PATIENCE)
+            outcomes["ok" if result["ok"] else "rejected"] += 1
+        except asyncio.TimeoutError as e:
+            # DeadlineExceededError 也是 TimeoutError
+            outcomes[type(e).__name__ if type(e) is not TimeoutError else "hung"] += 1
+        except Exception as e:
+            outcomes[type(e).__name__] += 1
+        latencies.append(perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(LOGINS)))
+    return outcomes, latencies
+
+
+def report(name: str, outcomes: Counter, latencies: list[float]) -> None:
+    print(
+        f"{name:<22} mean {mean(latencies):5.2f} s, max {max(latencies):5.2f} s, "
+        f"{dict(outcomes)}"
+    )
+
+
+async def main(cert: Path, key: Path) -> None:
+    app = stand_in.make_app(latency=0.01)
+    runner, url = await stand_in.serve(app, cert, key)
+    app["faults"]["stall"] = STALL
+
+    async with AsyncWebApClient(
+        stand_in.solve, url, timeout=600, deadline=600, ca_file=cert
+    ) as client:
+        report("No deadline", *await measure(client))
+
+    async with AsyncWebApClient(
+        stand_in.solve, url, deadline=1.0, ca_file=cert,
+        breaker=CircuitBreaker(failure_threshold=10**9),
+    ) as client:
+        report("Deadline 1 s", *await measure(client))
+
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=1.0)
+    async with AsyncWebApClient(
+        stand_in.solve, url, deadline=1.0, ca_file=cert, breaker=breaker
+    ) as client:
+        report("Deadline + breaker", *await measure(client))
+        print(f"{'':<22} {breaker.state}, {breaker.stats}")
+
+        # 伺服器恢復後，等到 reset_timeout 過去，探測成功就關閉斷路器
+        app["faults"]["stall"] = 0.0
+        report("Recovered, still open", *await measure(client))
+        await asyncio.sleep(1.0)
+        result = await client.login("user", "password")
+        print(f"{'Probe after 1 s':<22} ok={result['ok']}, {breaker.state}")
+        report("Recovered", *await measure(client))
+
+    await runner.cleanup()
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    asyncio.run(main(*stand_in.make_certificate(Path(tmp))))
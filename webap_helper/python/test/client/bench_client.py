@@ -0,0 +1,81 @@
+"""
+以本地的 HTTPS 伺服器模擬校務系統：驗證碼依 JSESSIONID 儲存在伺服器端，
+比較所有登入共用一個 ClientSession（舊的 aiohttp 腳本）與 AsyncWebApClient 的正確率與吞吐量。
+"""
+
+import asyncio
+import ssl
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+import aiohttp
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import stand_in
+from client import AsyncWebApClient
+
+LOGINS = 400
+SOLVE_TIME = 0.005  # 模擬辨識驗證碼的時間（秒）
+
+
+def solve(data: bytes) -> str:
+    time.sleep(SOLVE_TIME)  # 阻塞的辨識，必須在 executor 中執行
+    return stand_in.solve(data)
+
+
+async def shared_session(url: str, cert: Path) -> int:
+    # 舊的做法：所有登入共用一個 ClientSession（同一個 cookie jar）
+    ssl_context = ssl.create_default_context(cafile=str(cert))
+    ok = 0
+    async with aiohttp.ClientSession() as session:
+
+        async def login() -> None:
+            nonlocal ok
+            await (await session.get(url + "index.html", ssl=ssl_context)).read()
+            data = await (await session.get(url + "validateCode.jsp", ssl=ssl_context)).read()
+            captcha = solve(data)
+            response = await session.post(
+                url + "perchk.jsp", data={"etxt_code": captcha}, ssl=ssl_context
+            )
+            ok += stand_in.CAPTCHA_ERROR not in await response.text()
+
+        await asyncio.gather(*(login() for _ in range(LOGINS)))
+    return ok
+
+
+async def main(cert: Path, key: Path) -> None:
+    app = stand_in.make_app()
+    runner, url = await stand_in.serve(app, cert, key)
+
+    ok = await shared_session(url, cert)
+    print(f"Shared ClientSession:         {ok} / {LOGINS} captchas accepted")
+
+    for concurrency in (1, 8, 32):
+        app["connections"].clear()
+        # 這裡的 solve 是 thread-safe 的，才可以用多個執行緒；真正的 solver 用預設的單一執行緒
+        executor = ThreadPoolExecutor(concurrency)
+        async with AsyncWebApClient(
+            solve, url, concurrency=concurrency, ca_file=cert, executor=executor
+        ) as client:
+            start = perf_counter()
+            results = await client.login_many(("user", "password") for _ in range(LOGINS))
+            elapsed = perf_counter() - start
+        executor.shutdown()
+        ok = sum(not isinstance(r, BaseException) and r["ok"] for r in results)
+        print(
+            f"AsyncWebApClient(concurrency={concurrency:>2}): {ok} / {LOGINS} captchas accepted, "
+            f"{LOGINS / elapsed:6.1f} logins / s, {len(app['connections'])} connections"
+        )
+
+    await runner.cleanup()
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    asyncio.run(main(*stand_in.make_certificate(Path(tmp))))
@@ -0,0 +1,101 @@
+"""
+以會在過載時回應 503 的本地 HTTPS 伺服器，比較三種批次登入的方式：
+舊版 aiohttp 測試程式的固定批次加 sleep、固定的高並發，以及 AIMDController。
+"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import stand_in
+from client import AsyncWebApClient
+from controller import AIMDController
+
+LOGINS = 400
+CAPACITY = 12  # 伺服器同時能處理的請求數
+BATCH = 10
+
+
+def report(name: str, results: list, elapsed: float, app) -> None:
+    ok = sum(1 for r in results if isinstance(r, dict) and r["ok"])
+    failed = sum(1 for r in results if isinstance(r, BaseException))
+    print(
+        f"{name:<22} {ok} / {LOGINS} accepted, {failed:3d} failed, "
+        f"{app['counters']['overloaded']:4d} x 503, {elapsed:5.2f} s, {ok / elapsed:6.1f} logins/s"
+    )
+    app["counters"]["overloaded"] = 0
+
+
+async def check_cancellation() -> None:
+    """Requests cancelled while waiting for the rate pacing must not keep a slot."""
+    controller = AIMDController(concurrency=1, min_concurrency=1, rate=2.0)
+
+    async def request() -> None:
+        async with controller:
+            await asyncio.sleep(0.01)
+
+    # rate=2 時第二個以後的請求要等 0.5 秒以上，在等待中就被取消
+    tasks = [asyncio.create_task(request()) for _ in range(4)]
+    await asyncio.sleep(0.1)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert controller.in_flight == 0, f"{controller.in_flight} slots leaked"
+
+    # 同樣的情況換成 asyncio.timeout，之後仍然要能取得 slot
+    for _ in range(3):
+        try:
+            async with asyncio.timeout(0.05):
+                await request()
+        except TimeoutError:
+            pass
+    async with asyncio.timeout(5.0):
+        await request()
+    print(f"{'Cancellation':<22} in_flight={controller.in_flight}, no slot leaked")
+
+
+async def main(cert: Path, key: Path) -> None:
+    await check_cancellation()
+
+    app = stand_in.make_app(latency=0.01, capacity=CAPACITY)
+    runner, url = await stand_in.serve(app, cert, key)
+    accounts = [("user", "password")] * LOGINS
+
+    # 舊版測試程式：每批 10 個登入，批次之間 sleep 0.5 秒
+    async with AsyncWebApClient(stand_in.solve, url, concurrency=BATCH, ca_file=cert) as client:
+        start = perf_counter()
+        results = []
+        for i in range(0, LOGINS, BATCH):
+            results += await client.login_many(accounts[i : i + BATCH])
+            await asyncio.sleep(0.5)
+        report(f"Batch {BATCH} + sleep 0.5", results, perf_counter() - start, app)
+
+    async with AsyncWebApClient(stand_in.solve, url, concurrency=64, ca_file=cert) as client:
+        start = perf_counter()
+        results = await client.login_many(accounts)
+        report("Fixed concurrency 64", results, perf_counter() - start, app)
+
+    controller = AIMDController(max_concurrency=64, latency_target=0.5)
+    changes = []
+    controller.add_hook(lambda limits: changes.append(limits["concurrency"]))
+    async with AsyncWebApClient(
+        stand_in.solve, url, pool_size=64, ca_file=cert, limiter=controller
+    ) as client:
+        start = perf_counter()
+        results = await client.login_many(accounts)
+        report("AIMDController", results, perf_counter() - start, app)
+    print(f"{'':<22} {controller.limits}")
+    print(f"{'':<22} {controller.stats}")
+    print(f"{'':<22} concurrency changes: {changes}")
+
+    await runner.cleanup()
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    asyncio.run(main(*stand_in.make_certificate(Path(tmp))))
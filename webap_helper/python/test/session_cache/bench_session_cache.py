@@ -0,0 +1,102 @@
+"""
+以本地的 HTTPS 伺服器比較每次呼叫 API 都重新登入與 SessionCache 的延遲與登入次數，
+並確認同一個帳號的並發請求只會登入一次、伺服器端過期的 session 會自動重新登入，
+密碼錯誤的登入不會被快取。
+"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import stand_in
+from client import AsyncWebApClient
+from errors import LoginError
+from session_cache import SessionCache
+
+CALLS = 200
+ACCOUNTS = [(f"user{i}", "password") for i in range(4)]
+
+
+async def relogin_every_call(client: AsyncWebApClient, username: str, password: str) -> str:
+    # 原本的做法：每次呼叫 API 都重新登入
+    session, _ = await client.open_session(username, password)
+    async with session:
+        async with session.get(client.url("api.jsp")) as response:
+            return await response.text()
+
+
+async def run(name: str, app, call) -> None:
+    app["counters"].update(logins=0, api=0)
+    start = perf_counter()
+    texts = await asyncio.gather(*(call(*ACCOUNTS[i % len(ACCOUNTS)]) for i in range(CALLS)))
+    elapsed = perf_counter() - start
+    ok = sum(text == "<html>data</html>" for text in texts)
+    print(
+        f"{name:<26} {ok} / {CALLS} ok, {elapsed / CALLS * 1e3:5.2f} ms / call, "
+        f"{app['counters']['logins']} logins"
+    )
+
+
+async def main(cert: Path, key: Path) -> None:
+    app = stand_in.make_app(latency=0.01, session_ttl=0.5, password="password")
+    runner, url = await stand_in.serve(app, cert, key)
+
+    async with AsyncWebApClient(stand_in.solve, url, concurrency=16, ca_file=cert) as client:
+        await run("Re-login every call", app, lambda u, p: relogin_every_call(client, u, p))
+
+        cache = SessionCache(client, ttl=60)
+        fetch = lambda u, p: cache.fetch(u, p, "api.jsp")
+        await run("SessionCache (cold)", app, fetch)
+        await run("SessionCache (warm)", app, fetch)
+        print(f"{'':<26} {cache.stats}, {len(cache)} sessions, {cache.memory} bytes")
+
+        # 伺服器端的 session 過期後，下一次呼叫會自動重新登入
+        await asyncio.sleep(0.6)
+        await run("SessionCache after expiry", app, fetch)
+        print(f"{'':<26} {cache.stats}")
+
+        # 同一個帳號的 50 個並發請求只登入一次
+        await cache.close()
+        app["counters"].update(logins=0)
+        coalesced = cache.stats["coalesced"]
+        await asyncio.gather(*(cache.fetch("user0", "password", "api.jsp") for _ in range(50)))
+        print(
+            f"{'50 concurrent, 1 account':<26} {app['counters']['logins']} logins, "
+            f"{cache.stats['coalesced'] - coalesced} coalesced"
+        )
+
+        # 記憶體上限
+        per_session = cache.memory // len(cache)
+        small = SessionCache(client, max_bytes=2 * per_session)
+        for username, password in ACCOUNTS:
+            await small.fetch(username, password, "api.jsp")
+        print(f"{'max_bytes = 2 sessions':<26} {len(small)} sessions, {small.stats['evictions']} evictions")
+        await small.close()
+
+        # 密碼錯誤：第一次登入就拋出 LoginError，不會重試也不會放進快取
+        app["counters"].update(logins=0, api=0, rejected=0)
+        errors = await asyncio.gather(
+            *(cache.fetch("user0", "wrong", "api.jsp") for _ in range(10)), return_exceptions=True
+        )
+        assert all(isinstance(error, LoginError) for error in errors), errors
+        assert app["counters"]["logins"] == 1 and app["counters"]["api"] == 0
+        assert all(entry.digest != cache._digest("user0", "wrong") for entry in cache._entries.values())
+        text = await cache.fetch("user0", "password", "api.jsp")
+        assert text == "<html>data</html>"
+        print(
+            f"{'Wrong password, 10 calls':<26} {app['counters']['logins']} login, "
+            f"{app['counters']['rejected']} rejected, {len(cache)} sessions cached"
+        )
+        await cache.close()
+
+    await runner.cleanup()
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    asyncio.run(main(*stand_in.make_certificate(Path(tmp))))
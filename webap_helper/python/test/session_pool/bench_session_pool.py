@@ -0,0 +1,81 @@
+"""
+以本地的 HTTPS 伺服器比較直接登入與 PresolvedPool 的登入延遲，
+並確認 session 在伺服器端的驗證碼過期前就會被替換。
+"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+from statistics import mean, quantiles
+from time import perf_counter
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import stand_in
+from client import AsyncWebApClient
+from session_pool import PresolvedPool
+
+LOGINS = 200
+INTERVAL = 0.02  # 使用者登入請求的間隔（秒）
+
+
+async def measure(login) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    ok = 0
+
+    async def one() -> None:
+        nonlocal ok
+        start = perf_counter()
+        result = await login("user", "password")
+        latencies.append(perf_counter() - start)
+        ok += result["ok"]
+
+    tasks = []
+    for _ in range(LOGINS):
+        tasks.append(asyncio.create_task(one()))
+        await asyncio.sleep(INTERVAL)
+    await asyncio.gather(*tasks)
+    return latencies, ok
+
+
+def report(name: str, latencies: list[float], ok: int) -> None:
+    p50, p95 = (quantiles(latencies, n=20)[i] for i in (9, 18))
+    print(
+        f"{name:<24} {ok} / {LOGINS} accepted, mean {mean(latencies) * 1e3:5.1f} ms, "
+        f"p50 {p50 * 1e3:5.1f} ms, p95 {p95 * 1e3:5.1f} ms"
+    )
+
+
+async def main(cert: Path, key: Path) -> None:
+    app = stand_in.make_app(latency=0.01, captcha_ttl=0.5)
+    runner, url = await stand_in.serve(app, cert, key)
+
+    async with AsyncWebApClient(stand_in.solve, url, concurrency=16, ca_file=cert) as client:
+        report("Direct login", *await measure(client.login))
+
+        async with PresolvedPool(client, size=4, ttl=0.4) as pool:
+            await asyncio.sleep(0.2)  # 等待第一批 session 準備好
+            report("PresolvedPool(size=4)", *await measure(pool.login))
+            print(f"{'':<24} {pool.stats}")
+
+            # 閒置超過伺服器端驗證碼的壽命後再登入
+            await asyncio.sleep(1.0)
+            results = [await pool.login("user", "password") for _ in range(8)]
+            print(
+                f"{'After 1 s idle':<24} {sum(r['ok'] for r in results)} / 8 accepted, {pool.stats}"
+            )
+
+        # ttl 比伺服器端的壽命長時，閒置後取得的驗證碼已經失效
+        async with PresolvedPool(client, size=4, ttl=5.0) as pool:
+            await asyncio.sleep(1.0)
+            results = [await pool.login("user", "password") for _ in range(4)]
+            print(f"{'ttl > server lifetime':<24} {sum(r['ok'] for r in results)} / 4 accepted")
+
+    await runner.cleanup()
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    asyncio.run(main(*stand_in.make_certificate(Path(tmp))))
@@ -0,0 +1,143 @@
+"""
+本地的 HTTPS 校務系統替身，給 test/ 中的 benchmark 共用：
+驗證碼依 JSESSIONID 儲存在伺服器端，並會在 `captcha_ttl` 秒後過期；
+登入後的 session 閒置 `session_ttl` 秒後過期。
+設定 `password` 時，密碼不同的登入即使驗證碼正確也會被拒絕。
+設定 `capacity` 時，同時處理中的請求超過 capacity 就回應 503，模擬過載的伺服器；
+把 app["faults"]["stall"] 設為秒數時，每個請求都多等這麼久，模擬卡住的伺服器。
+憑證由 openssl 命令列工具產生。
+"""
+
+import asyncio
+import secrets
+import ssl
+import subprocess
+from pathlib import Path
+from time import monotonic
+
+from aiohttp import web
+
+CAPTCHA_ERROR = "驗證碼錯誤"
+PASSWORD_ERROR = "帳號或密碼錯誤"
+SESSION_EXPIRED = "登入逾時，請重新登入"
+
+
+def make_certificate(directory: Path) -> tuple[Path, Path]:
+    """A self-signed certificate for localhost; returns (cert, key)."""
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", str(key), "-out", str(cert), "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def make_app(
+    latency: float = 0.01,
+    captcha_ttl: float = 600.0,
+    session_ttl: float = 600.0,
+    capacity: int | None = None,
+    password: str | None = None,
+) -> web.Application:
+    """
+    index.html sets JSESSIONID, validateCode.jsp stores a new captcha for it
+    (the first 4 bytes of the body are the answer) and perchk.jsp checks it.
+    api.jsp stands for any page that needs a logged-in session.
+    Past `capacity` requests in flight, the extra requests get a 503.
+    With `password`, any other password is rejected after the captcha check.
+    """
+    captchas: dict[str, tuple[str, float]] = {}
+    sessions: dict[str, float] = {}  # logged-in JSESSIONID -> last used
+    connections: set[int] = set()
+    counters = {"logins": 0, "api": 0, "overloaded": 0, "rejected": 0}
+    faults = {"stall": 0.0}
+    in_flight = 0
+
+    @web.middleware
+    async def overload(request: web.Request, handler) -> web.StreamResponse:
+        nonlocal in_flight
+        await asyncio.sleep(faults["stall"])
+        if capacity is not None and in_flight >= capacity:
+            counters["overloaded"] += 1
+            await asyncio.sleep(latency)
+            raise web.HTTPServiceUnavailable()
+        in_flight += 1
+        try:
+            return await handler(request)
+        finally:
+            in_flight -= 1
+
+    async def index(request: web.Request) -> web.Response:
+        connections.add(id(request.transport))
+        await asyncio.sleep(latency)
+        response = web.Response(text="<html>login</html>")
+        response.set_cookie("JSESSIONID", secrets.token_hex(16), path="/nkust")
+        return response
+
+    async def captcha(request: web.Request) -> web.Response:
+        connections.add(id(request.transport))
+        await asyncio.sleep(latency)
+        code = secrets.token_hex(2).upper()
+        captchas[request.cookies.get("JSESSIONID", "")] = (code, monotonic())
+        # 其餘補到和真實驗證碼差不多大
+        return web.Response(body=code.encode().ljust(4000, b"\0"), content_type="image/bmp")
+
+    async def perchk(request: web.Request) -> web.Response:
+        connections.add(id(request.transport))
+        await asyncio.sleep(latency)
+        form = await request.post()
+        session_id = request.cookies.get("JSESSIONID", "")
+        code, created = captchas.pop(session_id, (None, 0.0))
+        counters["logins"] += 1
+        if form.get("etxt_code") != code or monotonic() - created > captcha_ttl:
+            return web.Response(text=CAPTCHA_ERROR)
+        if password is not None and form.get("pwd") != password:
+            counters["rejected"] += 1
+            return web.Response(text=PASSWORD_ERROR)
+        sessions[session_id] = monotonic()
+        return web.Response(text="<html>ok</html>")
+
+    async def api(request: web.Request) -> web.Response:
+        connections.add(id(request.transport))
+        await asyncio.sleep(latency)
+        session_id = request.cookies.get("JSESSIONID", "")
+        last_used = sessions.get(session_id)
+        if last_used is None or monotonic() - last_used > session_ttl:
+            sessions.pop(session_id, None)
+            return web.Response(text=SESSION_EXPIRED)
+        sessions[session_id] = monotonic()
+        counters["api"] += 1
+        return web.Response(text="<html>data</html>")
+
+    app = web.Application(middlewares=[overload])
+    app.router.add_get("/nkust/index.html", index)
+    app.router.add_get("/nkust/validateCode.jsp", captcha)
+    app.router.add_post("/nkust/perchk.jsp", perchk)
+    app.router.add_get("/nkust/api.jsp", api)
+    app["connections"] = connections
+    app["sessions"] = sessions
+    app["counters"] = counters
+    app["faults"] = faults
+    return app
+
+
+async def serve(app: web.Application, cert: Path, key: Path) -> tuple[web.AppRunner, str]:
+    """Serve `app` over HTTPS on a free port; returns the runner and the base URL."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    site = web.TCPSite(runner, "localhost", 0, ssl_context=context)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"https://localhost:{port}/nkust/"
+
+
+def solve(data: bytes) -> str:
+    """The stand-in's captcha answer."""
+    return data[:4].decode()
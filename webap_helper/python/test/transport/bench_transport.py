@@ -0,0 +1,150 @@
+"""
+以本地的 HTTPS 伺服器模擬校務系統（index.html -> validateCode.jsp -> perchk.jsp），
+比較每次登入都建立新 Session 與共用 Transport 連線池的延遲與 TLS 握手次數，
+並確認伺服器卡住時，被期限縮短的逾時會拋出 DeadlineExceededError。
+憑證由 openssl 命令列工具產生。
+"""
+
+import ssl
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter, sleep
+from uuid import uuid4
+
+import requests
+
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from deadline import Deadline
+from errors import DeadlineExceededError
+from transport import Transport
+
+LOGINS = 300
+WORKERS = 8
+CAPTCHA = bytes(4000)  # 與真實驗證碼差不多大小的 body
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # 標頭與內容分兩次寫入，避免 Nagle 延遲
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.handshakes += 1
+
+    def _reply(self, body: bytes, content_type: str, cookie: bool = False) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        if cookie:
+            self.send_header("Set-Cookie", f"JSESSIONID={uuid4().hex}; Path=/nkust")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        sleep(self.server.stall)
+        if self.path.startswith("/nkust/validateCode.jsp"):
+            self._reply(CAPTCHA, "image/bmp")
+        else:
+            self._reply(b"<html>login</html>", "text/html", cookie=True)
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply("驗證碼錯誤".encode(), "text/html; charset=utf-8")
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def start_server(cert: Path, key: Path) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.handshakes = 0
+    server.stall = 0.0  # 每個 GET 多等幾秒，模擬卡住的伺服器
+    server.handle_error = lambda request, address: None  # 用戶端逾時離開後寫入失敗
+    server.lock = threading.Lock()
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def login(session: requests.Session, url: str, **kwargs) -> None:
+    session.get(url + "index.html", **kwargs)
+    session.get(url + "validateCode.jsp", **kwargs).content
+    session.post(url + "perchk.jsp", data={"uid": "", "pwd": "", "etxt_code": "AAAA"}, **kwargs)
+
+
+def run(name: str, server: ThreadingHTTPServer, attempt) -> None:
+    server.handshakes = 0
+    for workers in (1, WORKERS):
+        start = perf_counter()
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(lambda _: attempt(), range(LOGINS)))
+        elapsed = perf_counter() - start
+        print(
+            f"{name:<28} workers={workers}: {elapsed / LOGINS * 1e3:6.2f} ms / login, "
+            f"{LOGINS / elapsed:7.1f} logins / s"
+        )
+    print(f"{'':<28} TLS handshakes: {server.handshakes} for {2 * LOGINS} logins")
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    cert, key = Path(tmp) / "cert.pem", Path(tmp) / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", str(key), "-out", str(cert), "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    server = start_server(cert, key)
+    url = f"https://localhost:{server.server_address[1]}/nkust/"
+
+    def fresh_session() -> None:
+        # 原本的做法：每次登入都建立新的 Session
+        with requests.Session() as session:
+            login(session, url, verify=str(cert))
+
+    run("requests.Session per login", server, fresh_session)
+
+    with Transport(url, pool_size=WORKERS, ca_file=cert) as transport:
+
+        def pooled() -> None:
+            with transport.session() as session:
+                login(session, url)
+
+        run("Transport (shared pool)", server, pooled)
+
+        # 伺服器卡住：期限縮短的逾時拋出 DeadlineExceededError，沒有期限時仍是 requests.Timeout
+        server.stall = 1.0
+        with transport.session() as session:
+            start = perf_counter()
+            try:
+                session.get(url + "index.html", deadline=Deadline(1.0), step="index")
+            except DeadlineExceededError as e:
+                print(f"{'Deadline 1 s, stalled':<28} {e!r} after {perf_counter() - start:.2f} s")
+            else:
+                raise AssertionError("the stalled request did not time out")
+            try:
+                session.get(url + "index.html", timeout=0.2)
+            except DeadlineExceededError:
+                raise AssertionError("a plain timeout became DeadlineExceededError")
+            except requests.RequestException as e:
+                # 重試後仍逾時時，requests 拋出的是 ConnectionError
+                print(f"{'timeout=0.2, stalled':<28} {type(e).__name__}")
+        server.stall = 0.0
+
+    server.shutdown()
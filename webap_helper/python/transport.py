@@ -0,0 +1,195 @@
+"""
+連線到校務系統的 HTTP 傳輸層：所有登入共用一個 keep-alive 連線池，
+每次登入各自有獨立的 cookie，並以 nkust.pem 驗證憑證。
+
+    transport = Transport(pool_size=8)
+    with transport.session() as session:
+        session.get(transport.url("index.html"))
+        image = session.get(transport.url("validateCode.jsp")).content
+
+傳入 `deadline` 與 `step` 時，請求的逾時會縮短到該步驟分到的時間，
+因此逾時會拋出 DeadlineExceededError：
+
+    deadline = Deadline(30.0)
+    session.get(transport.url("index.html"), deadline=deadline, step="index")
+"""
+
+from __future__ import annotations
+import ssl
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+
+from breaker import CircuitBreaker
+from deadline import Deadline
+from errors import DeadlineExceededError
+
+WEBAP_URL = "https://webap0.nkust.edu.tw/nkust/"
+CA_FILE = Path(__file__).resolve().parents[2] / "webap_captcha" / "python" / "nkust.pem"
+
+Timeout = float | tuple[float, float]  # total, or (connect, read) in seconds
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter shared by many sessions.
+
+    Requests without an explicit timeout use `timeout`, and every connection
+    verifies the server with one `ssl.SSLContext`, so the CA file is parsed
+    once instead of on every handshake. With `pool_block`, logins wait for a
+    free connection instead of opening throwaway ones past `pool_size`.
+    Every request goes through `breaker`, so once the WebAp keeps failing
+    requests raise `CircuitOpenError` instead of waiting for their timeout.
+    """
+
+    def __init__(
+        self,
+        ssl_context: ssl.SSLContext,
+        pool_size: int = 10,
+        timeout: Timeout = (3.05, 10.0),
+        pool_block: bool = True,
+        max_retries: int = 1,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.ssl_context = ssl_context
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        super().__init__(
+            pool_connections=2,  # webap.nkust.edu.tw and webap0.nkust.edu.tw
+            pool_maxsize=pool_size,
+            pool_block=pool_block,
+            max_retries=max_retries,
+        )
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        kwargs["ssl_context"] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, timeout=None, **kwargs) -> requests.Response:
+        self.breaker.check()
+        try:
+            response = super().send(
+                request, timeout=self.timeout if timeout is None else timeout, **kwargs
+            )
+        except BaseException as exc:
+            self.breaker.record(exc)
+            raise
+        if response.status_code >= 500:
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+        return response
+
+
+def _is_timeout(exc: requests.RequestException) -> bool:
+    # 重試後仍逾時或讀取 body 時逾時，requests 會包成
+    # ConnectionError(MaxRetryError(reason=ReadTimeoutError)) 或 ConnectionError(ReadTimeoutError)
+    return isinstance(exc, requests.Timeout) or any(
+        isinstance(getattr(arg, "reason", arg), urllib3.exceptions.TimeoutError)
+        for arg in exc.args
+    )
+
+
+class LoginSession(requests.Session):
+    """
+    A session with its own cookie jar on a shared `PooledAdapter`.
+    `close` only forgets the cookies; the pooled connections stay open.
+
+    A request given a `deadline` and its `step` waits at most
+    `deadline.budget(step)` seconds (or `timeout`, when shorter). When the
+    deadline is what shortened the timeout, the timeout raises
+    `DeadlineExceededError` instead of `requests.Timeout`.
+    """
+
+    def __init__(self, timeout: Timeout = (3.05, 10.0)):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *args,
+        deadline: Deadline | None = None,
+        step: str = "",
+        **kwargs,
+    ) -> requests.Response:
+        if deadline is None:
+            return super().request(method, url, *args, **kwargs)
+        budget = deadline.budget(step)
+        timeout = kwargs.get("timeout") or self.timeout
+        limits = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        kwargs["timeout"] = tuple(min(limit, budget) for limit in limits)
+        try:
+            return super().request(method, url, *args, **kwargs)
+        except requests.RequestException as exc:
+            # 原本的逾時比期限短時，逾時與期限無關
+            if _is_timeout(exc) and budget < max(limits):
+                raise DeadlineExceededError(step, deadline.total) from exc
+            raise
+
+    def close(self) -> None:
+        self.cookies.clear()
+
+
+class Transport:
+    """
+    Hand out `LoginSession`s that share one connection pool to the WebAp.
+
+    - `pool_size`: connections kept per host; also the useful login concurrency.
+    - `timeout`: default (connect, read) timeout of every request.
+    - `keep_alive`: False sends `Connection: close`, so every request pays a
+      new TCP and TLS handshake (only useful for comparison).
+    - `ca_file`: certificate used to verify the server (nkust.pem).
+    - `max_retries`: retries of failed connections; one retry covers a pooled
+      connection the server closed while it was idle.
+    - `breaker`: circuit breaker shared by every session (a default
+      `CircuitBreaker` when None).
+    """
+
+    def __init__(
+        self,
+        base_url: str = WEBAP_URL,
+        pool_size: int = 10,
+        timeout: Timeout = (3.05, 10.0),
+        keep_alive: bool = True,
+        ca_file: str | Path = CA_FILE,
+        max_retries: int = 1,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+        self.ssl_context = ssl.create_default_context(cafile=str(ca_file))
+        self.adapter = PooledAdapter(
+            self.ssl_context,
+            pool_size=pool_size,
+            timeout=timeout,
+            max_retries=max_retries,
+            breaker=breaker,
+        )
+        self.breaker = self.adapter.breaker
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def session(self) -> LoginSession:
+        """A new session for one login, with its own cookies."""
+        session = LoginSession(self.adapter.timeout)
+        session.headers.update({"User-Agent": "Mozilla/5.0", "Referer": self.base_url})
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        return session
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        self.adapter.close()
+
+    def __enter__(self) -> Transport:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()